@@ -6,10 +6,9 @@ AZURE_ENDPOINT = "https://your-resource.openai.azure.com/"
 # export AZURE_OPENAI_API_KEY="your-api-key"
 
 # Initialize generator
-generator = SyntheticDataGenerator(DEFAULT_CONFIG, AZURE_ENDPOINT)
+with SyntheticDataGenerator(DEFAULT_CONFIG, AZURE_ENDPOINT) as generator:
+    # Generate dataset
+    dataset = generator.generate_dataset()
 
-# Generate dataset
-dataset = generator.generate_dataset()
-
-# Export in multiple formats
-generator.export_dataset(dataset, "./synthetic_data")
+    # Export in multiple formats
+    generator.export_dataset(dataset, "./synthetic_data")
@@ -7,7 +7,7 @@ from .generators.synthetic_data_generator import SyntheticDataGenerator
 from .generators.ai_text_generator import AITextGenerator
 from .core.data_models import Fattura, Transazione
 from .core.data_types import MatchType, QualityLevel, TimingPattern, AmountPattern, GroundTruth
-from .config.settings import DEFAULT_CONFIG
+from .config.settings import DEFAULT_CONFIG, GeneratorConfig
 
 __all__ = [
     'SyntheticDataGenerator',
@@ -19,5 +19,6 @@ __all__ = [
     'TimingPattern',
     'AmountPattern',
     'GroundTruth',
-    'DEFAULT_CONFIG'
+    'DEFAULT_CONFIG',
+    'GeneratorConfig'
 ]
\ No newline at end of file
@@ -1,34 +1,116 @@
-DEFAULT_CONFIG = {
-    'scenarios': {
-        'perfect_1_1': 30,
-        'installments_1_n': 30,
-        'group_payment_n_1': 30,
-        'standalone_invoices': 5,
-        'standalone_payments': 5
-    },
-    'num_companies': 20,
-    'recurrency_patterns': {
-        'recurring_clients': 0.3,
-        'similar_services': 0.4,
-        'monthly_services': 0.2,
-        'project_based': 0.3
-    },
-    'quality_distribution': {
-        'perfect': 0.8,
-        'fuzzy': 0.1,
-        'noisy': 0.1
-    },
-    'timing_distribution': {
-        'standard': 0.6,
-        'delayed': 0.2,
-        'early': 0.1,
-        'same_day': 0.1
-    },
-    'amount_distribution': {
-        'exact': 0.8,
-        'partial': 0.05,
-        'excess': 0.0,
-        'discount': 0.1,
-        'penalty': 0.04
-    }
-}
\ No newline at end of file
+from dataclasses import asdict, dataclass, field, fields
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+
+@dataclass(slots=True, frozen=True)
+class ScenarioCounts:
+    perfect_1_1: int = 0
+    installments_1_n: int = 0
+    group_payment_n_1: int = 0
+    standalone_invoices: int = 0
+    standalone_payments: int = 0
+
+
+@dataclass(slots=True, frozen=True)
+class RecurrencyPatterns:
+    recurring_clients: float = 0.3
+    similar_services: float = 0.4
+    monthly_services: float = 0.2
+    project_based: float = 0.3
+
+
+@dataclass(slots=True, frozen=True)
+class QualityDistribution:
+    perfect: float = 0.8
+    fuzzy: float = 0.1
+    noisy: float = 0.1
+
+
+@dataclass(slots=True, frozen=True)
+class TimingDistribution:
+    standard: float = 0.6
+    delayed: float = 0.2
+    early: float = 0.1
+    same_day: float = 0.1
+
+
+@dataclass(slots=True, frozen=True)
+class AmountDistribution:
+    exact: float = 0.8
+    partial: float = 0.05
+    excess: float = 0.0
+    discount: float = 0.1
+    penalty: float = 0.04
+
+
+@dataclass(slots=True, frozen=True)
+class GeneratorConfig:
+    """Immutable generator settings; sections are read as attributes (cfg.scenarios.perfect_1_1)"""
+    scenarios: ScenarioCounts = field(default_factory=lambda: ScenarioCounts(
+        perfect_1_1=30,
+        installments_1_n=30,
+        group_payment_n_1=30,
+        standalone_invoices=5,
+        standalone_payments=5
+    ))
+    num_companies: int = 20
+    max_concurrency: int = 16  # Concurrent LLM requests per batch
+    requests_per_second: Optional[float] = None  # LLM request rate cap; None sends as fast as max_concurrency allows
+    seed: Optional[int] = None
+    cache_size: int = 0  # Entries in the LLM response cache; 0 disables it
+    cache_path: Optional[str] = None  # SQLite file persisting LLM texts across runs
+    template_fraction: float = 0.0  # Share of payment texts rendered from templates instead of the LLM
+    template_max_amount: Optional[float] = None  # Payments up to this amount always use the templates
+    batch_size: Optional[int] = None  # Max items generated per scenario call; None generates each scenario at once
+    shard_dir: Optional[str] = None   # When set, generated batches are spilled to Parquet shards here
+    use_batch_api: bool = False  # Request the LLM texts through the discounted, asynchronous Batch API
+    batch_poll_interval: float = 30.0  # Seconds between Batch API job status checks
+    pair_prompts: bool = False  # Write each 1:1 invoice and its payment in one LLM call (bypasses cache and templates)
+    recurrency_patterns: RecurrencyPatterns = field(default_factory=RecurrencyPatterns)
+    quality_distribution: QualityDistribution = field(default_factory=QualityDistribution)
+    timing_distribution: TimingDistribution = field(default_factory=TimingDistribution)
+    amount_distribution: AmountDistribution = field(default_factory=AmountDistribution)
+
+    @classmethod
+    def from_dict(cls, config: Mapping) -> 'GeneratorConfig':
+        """Build the settings from the nested-dict form.
+
+        Missing keys take the section defaults, so unlisted scenarios are not generated.
+        """
+        kwargs = {}
+        for f in fields(cls):
+            section = _SECTIONS.get(f.name)
+            if f.name not in config:
+                if section is not None:
+                    kwargs[f.name] = section()
+                continue
+            value = config[f.name]
+            if section is not None and isinstance(value, Mapping):
+                names = {s.name for s in fields(section)}
+                value = section(**{k: v for k, v in value.items() if k in names})
+            kwargs[f.name] = value
+        return cls(**kwargs)
+
+    def to_dict(self) -> dict:
+        """Plain nested-dict copy, e.g. for JSON export"""
+        return asdict(self)
+
+
+_SECTIONS = {
+    'scenarios': ScenarioCounts,
+    'recurrency_patterns': RecurrencyPatterns,
+    'quality_distribution': QualityDistribution,
+    'timing_distribution': TimingDistribution,
+    'amount_distribution': AmountDistribution,
+}
+
+
+def _freeze(mapping: dict) -> MappingProxyType:
+    return MappingProxyType({k: _freeze(v) if isinstance(v, dict) else v for k, v in mapping.items()})
+
+
+DEFAULT_SETTINGS = GeneratorConfig()
+
+# Read-only nested-dict view of the defaults, for code that indexes the config by key
+DEFAULT_CONFIG = _freeze(DEFAULT_SETTINGS.to_dict())
@@ -1,20 +1,51 @@
-from datetime import datetime, timedelta
+import re
+import itertools
+from functools import cached_property
+from datetime import datetime, timedelta, time
 from uuid import UUID, uuid4
+import numpy as np
 from pydantic import (
     BaseModel,
+    ConfigDict,
     Field,
     PositiveFloat,
     NonNegativeFloat,
     ValidationError,
-    FieldValidationInfo,
     field_validator,
+    model_validator,
 )
 from typing import Literal, Optional
 
+_MIDNIGHT = time.min
+
+# Ids only need to be unique within a run: one random prefix plus a counter
+# avoids an os.urandom call per generated record. The prefix comes from a uuid4,
+# so it carries the version 4 bits; the RFC 4122 variant bits are set on top of
+# the counter, which keeps the ids valid version 4 UUIDs (but sequential within a run)
+_UUID_BASE = int.from_bytes(uuid4().bytes[:8], 'big') << 64 | 0x8000_0000_0000_0000
+_UUID_COUNTER = itertools.count()
+
+def _fast_uuid() -> UUID:
+    return UUID(int=_UUID_BASE | next(_UUID_COUNTER))
+
+# Italian dd-mm-yyyy / dd/mm/yyyy dates, as in the Fattura field examples
+_IT_DATE_RE = re.compile(r'(\d{1,2})[-/](\d{1,2})[-/](\d{4})$')
+
+def _parse_it_date(value: str):
+    match = _IT_DATE_RE.match(value)
+    if match:
+        day, month, year = match.groups()
+        return datetime(int(year), int(month), int(day))
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        # Leave it to pydantic's own parser, which reports the error
+        return value
+
 
 class Fattura(BaseModel):
     """Modello dati per una fattura"""
-    id: Optional[UUID] = Field(default_factory=uuid4, description="Unique identifier")
+    id: Optional[UUID] = Field(default_factory=_fast_uuid, description="Unique identifier (unique within a generation run)")
     data_emissione: datetime = Field(
         ...,
         examples = ['01-07-2025', '01-05-2024', '10/12/2024', '09/01/2024'],
@@ -57,36 +88,51 @@ class Fattura(BaseModel):
         description = "Soggetto che richiede la prestazione di servizio"
     )
 
-    @field_validator('data_scadenza')
+    @field_validator('data_emissione', 'data_scadenza', mode='before')
     @classmethod
-    def validate_scadenza_date(
-        cls, v: datetime, info: FieldValidationInfo
-    ) -> datetime:
-        # Access the entire model's values to get data_emissione
-        if info.data and 'data_emissione' in info.data:
-            data_emissione = info.data['data_emissione']
-            if not isinstance(data_emissione, datetime):
-                raise ValueError("data_emissione must be a datetime object")
-        
-            # Calculate the minimum allowed data_scadenza (same day as data_emissione)
-            min_data_scadenza = data_emissione.replace(hour=0, minute=0, second=0, microsecond=0)
+    def parse_date(cls, v):
+        if isinstance(v, str):
+            return _parse_it_date(v)
+        return v
+
+    @model_validator(mode='after')
+    def validate_scadenza_date(self) -> 'Fattura':
+        # Runs once all fields are parsed, so both dates are already datetime objects
+        data_emissione = self.data_emissione
+        data_scadenza = self.data_scadenza
         
-            # Calculate the maximum allowed data_scadenza (90 days after data_emissione)
-            max_data_scadenza = data_emissione + timedelta(days=90)
+        # Allowed range: from midnight of the emission day to 90 days after emission
+        min_data_scadenza = datetime.combine(data_emissione.date(), _MIDNIGHT, data_emissione.tzinfo)
+        max_data_scadenza = data_emissione + timedelta(days=90)
         
-            # Check if data_scadenza is within the allowed range
-            if not (min_data_scadenza <= v <= max_data_scadenza):
-                raise ValueError(
-                    f"La data di scadenza ({v.strftime('%Y-%m-%d')}) deve essere compresa tra "
-                    f"la data di emissione ({data_emissione.strftime('%Y-%m-%d')}) "
-                    f"e al massimo 90 giorni dopo ({max_data_scadenza.strftime('%Y-%m-%d')})."
-                )
-        return v
+        if not (min_data_scadenza <= data_scadenza <= max_data_scadenza):
+            raise ValueError(
+                f"La data di scadenza ({data_scadenza:%Y-%m-%d}) deve essere compresa tra "
+                f"la data di emissione ({data_emissione:%Y-%m-%d}) "
+                f"e al massimo 90 giorni dopo ({max_data_scadenza:%Y-%m-%d})."
+            )
+        return self
+
+    @cached_property
+    def descrizione_short(self) -> str:
+        """Descrizione troncata a 100 caratteri, usata nei prompt delle transazioni"""
+        return self.descrizione[:100]
+
+    @classmethod
+    def validate_batch(cls, emissione: np.ndarray, scadenza: np.ndarray) -> np.ndarray:
+        """Vectorized version of validate_scadenza_date for datetime64[D] arrays.
+
+        Returns the indices of the rows whose data_scadenza is out of range.
+        """
+        emissione = np.asarray(emissione, dtype='datetime64[D]')
+        scadenza = np.asarray(scadenza, dtype='datetime64[D]')
+        valid = (scadenza >= emissione) & (scadenza <= emissione + np.timedelta64(90, 'D'))
+        return np.flatnonzero(~valid)
 
 
 class Transazione(BaseModel):
     """Modello dati per una transazione bancaria"""
-    id: Optional[UUID] = Field(default_factory=uuid4, description="Unique identifier")
+    id: Optional[UUID] = Field(default_factory=_fast_uuid, description="Unique identifier (unique within a generation run)")
     data: datetime = Field(
         ...,
         examples = [datetime(2025, 7, 1), datetime(2025, 6, 15)],
@@ -149,4 +195,28 @@ class Transazione(BaseModel):
         description = "causale della transazione"
     )
     invoice_number: bool #whether or not the descrizione/causal contains invoice number
-    
\ No newline at end of file
+
+
+class AIInvoiceOutput(BaseModel):
+    """Campi testuali di una fattura generati dall'LLM (schema JSON strict)"""
+    model_config = ConfigDict(extra='forbid')
+
+    descrizione: str = Field(..., description="descrizione dei prodotti/servizi")
+    committente: str = Field(..., description="Soggetto che richiede la prestazione di servizio")
+
+
+class AITransactionOutput(BaseModel):
+    """Campi testuali di una transazione generati dall'LLM (schema JSON strict)"""
+    model_config = ConfigDict(extra='forbid')
+
+    dettaglio: str = Field(..., description="dettagli di riferimento relativi a un pagamento o a una transazione bancaria")
+    causale: str = Field(..., description="causale della transazione")
+    controparte: str = Field(..., description="controparte della transazione")
+
+
+class AIPairOutput(BaseModel):
+    """Testi di una fattura e del bonifico che la paga, generati insieme dall'LLM (schema JSON strict)"""
+    model_config = ConfigDict(extra='forbid')
+
+    fattura: AIInvoiceOutput
+    transazione: AITransactionOutput
@@ -25,7 +25,7 @@ class AmountPattern(Enum):
     DISCOUNT = "discount"
     PENALTY = "penalty"
 
-@dataclass
+@dataclass(slots=True)
 class GroundTruth:
     fattura_id: str
     pagamento_id: str
@@ -1,37 +1,30 @@
 import os
+import re
+import hashlib
 import random
+import inspect
+import asyncio
 import logging
-from typing import Tuple
-from langchain_openai import AzureChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from datetime import datetime
+import string
+import itertools
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
 
-from ..core.data_models import Fattura, Transazione
-from pydantic import BaseModel
+from pydantic import ValidationError
+from ..core.data_models import Fattura, AIInvoiceOutput, AITransactionOutput, AIPairOutput
 from ..core.exceptions import GenerationError
+from ..utils.cache_utils import ResponseCache
+from ..utils.batch_utils import run_chat_batch_job
 
 logger = logging.getLogger(__name__)
 
-class AITextGenerator:
-    """Handles AI-powered text generation for invoices and transactions"""
-    
-    def __init__(self, azure_endpoint: str, api_version: str = "2024-08-01-preview", 
-                 model: str = "gpt-4o", temperature: float = 0.7):
-        self.llm = AzureChatOpenAI(
-            azure_endpoint=azure_endpoint,
-            openai_api_version=api_version,
-            deployment_name=model,
-            openai_api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            temperature=temperature
-        )
-        self.llm_invoice = self.llm.with_structured_output(Fattura)
-        self.llm_trans = self.llm.with_structured_output(Transazione)
-    
-    def generate_invoice_data(self, company_id: str, data_emissione: str, settore: str, prestatore: str, 
-                             importo: float, tipo_servizio: str) -> Tuple[str, str, str]:
-        """Generate realistic invoice description and committente"""
-        prompt_template = ChatPromptTemplate.from_messages([
-        ("system", """Genera una fattura italiana realistica. 
+def _clean_prompt(text: str) -> str:
+    """Strip the source indentation and trailing spaces that would otherwise be sent as prompt tokens"""
+    return re.sub(r'[ \t]+$', '', inspect.cleandoc(text), flags=re.MULTILINE)
+
+# Prompt messages are built once into the chains held by AITextGenerator
+INVOICE_MSGS = (
+    ("system", _clean_prompt("""Genera una fattura italiana realistica. 
         
         IMPORTANTE per la DESCRIZIONE:
         - Usa un linguaggio tecnico e burocratico tipico delle fatture italiane
@@ -48,82 +41,743 @@ class AITextGenerator:
         - Genera un nome aziendale italiano realistico
         - Varia tra SRL, SPA, SNCS, SAS, Ditta individuale
         - Il nome dell'azienda dev'essere coerente con il servizio/prodotto menzionato nella descrizione (e.g. una consulenza legale potrebbe essere offerta da uno studio legale)
-        """),
-        ("human", "Attributi fattura:\n{attributi_fattura}")
-        ])
-        
-        attributi_fattura = f"""
-        - Data emissione: {data_emissione}
-        - Settore: {settore}
-        - Prestatore: {prestatore}
-        - Importo: €{importo:.2f}
-        - Tipo servizio: {tipo_servizio}
-        """
-        
-        chain = prompt_template | self.llm_invoice
-        try:
-            response: AIInvoiceOutput = chain.invoke({"attributi_fattura": attributi_fattura})
-            return response.descrizione, response.committente, response.numero_fattura
-        except Exception as e:
-            logger.error(f"Error generating invoice data: {e}")
-            return self._get_fallback_invoice_data(tipo_servizio, data_emissione)
-    
-    def generate_transaction_data(self, fattura: Fattura, importo: float, 
-                                invoice_number_probability: float = 0.1) -> Tuple[str, str, str, bool]:
-        """Generate realistic transaction dettaglio, causale and controparte"""
-        include_invoice_number = random.random() < invoice_number_probability
-        
-        if include_invoice_number:
-            prompt_template = ChatPromptTemplate.from_messages([
-                ("system", """Genera una transazione bancaria italiana realistica.
+        """)),
+    ("human", "Attributi fattura:\n{attributi_fattura}"),
+)
+
+# Both transaction variants share the same system message, so the static prefix of every
+# request is identical and can be served from the provider's prompt cache; the only
+# differing instruction is appended to the human turn, after the variable attributes
+TRANSACTION_SYSTEM_PROMPT = _clean_prompt("""Genera una transazione bancaria italiana realistica.
                 
                 IMPORTANTE:
                 - Il dettaglio deve essere tipico dei bonifici italiani
                 - La causale deve essere concisa e professionale
                 - La controparte può essere uguale o leggermente diversa dal beneficiario
                 - Usa terminologia bancaria italiana standard
-                - Include il numero fattura nel dettaglio e/o causale
-                """),
-                ("human", "Attributi transazione:\n{attributi_transazione}")
-            ])
-            
-            attributi_transazione = f"""
-            BENEFICIARIO: {fattura.prestatore}
-            IMPORTO: €{importo:.2f}
-            NUMERO_FATTURA: {fattura.numero_fattura}
-            DESCRIZIONE_FATTURA: {fattura.descrizione[:100]}...
-            """
+                """)
+
+TRANSACTION_WITH_NUMBER_MSGS = (
+    ("system", TRANSACTION_SYSTEM_PROMPT),
+    ("human", "Attributi transazione:\n{attributi_transazione}\n\n"
+              "Include il numero fattura nel dettaglio e/o causale"),
+)
+
+TRANSACTION_WITHOUT_NUMBER_MSGS = (
+    ("system", TRANSACTION_SYSTEM_PROMPT),
+    ("human", "Attributi transazione:\n{attributi_transazione}\n\n"
+              "NON includere il numero fattura - usa solo descrizioni generiche del servizio"),
+)
+
+# An invoice and the payment that settles it, written in one call: the invoice instructions
+# followed by the transaction ones, so the two texts are consistent by construction
+PAIR_SYSTEM_PROMPT = INVOICE_MSGS[0][1] + "\n\n" + _clean_prompt("""TRANSAZIONE (il bonifico che paga la fattura):
+    - Il dettaglio deve essere tipico dei bonifici italiani
+    - La causale deve essere concisa e professionale
+    - La controparte può essere uguale o leggermente diversa dal prestatore
+    - Usa terminologia bancaria italiana standard
+    """)
+
+PAIR_WITH_NUMBER_MSGS = (
+    ("system", PAIR_SYSTEM_PROMPT),
+    ("human", "Attributi fattura:\n{attributi_fattura}\n\n"
+              "Include il numero fattura nel dettaglio e/o causale della transazione"),
+)
+
+PAIR_WITHOUT_NUMBER_MSGS = (
+    ("system", PAIR_SYSTEM_PROMPT),
+    ("human", "Attributi fattura:\n{attributi_fattura}\n\n"
+              "NON includere il numero fattura nella transazione - usa solo descrizioni generiche del servizio"),
+)
+
+# Attribute blocks filled into the human messages; extra keys are ignored by format_map
+_INVOICE_ATTR_TMPL = (
+    "- Data emissione: {data_emissione}\n"
+    "- Settore: {settore}\n"
+    "- Prestatore: {prestatore}\n"
+    "- Importo: €{importo:.2f}\n"
+    "- Tipo servizio: {tipo_servizio}"
+)
+
+_PAIR_ATTR_TMPL = _INVOICE_ATTR_TMPL + "\n- Numero fattura: {numero_fattura}"
+
+_TRANSACTION_WITH_NUMBER_ATTR_TMPL = (
+    "BENEFICIARIO: {prestatore}\n"
+    "IMPORTO: €{importo:.2f}\n"
+    "NUMERO_FATTURA: {numero_fattura}\n"
+    "DESCRIZIONE_FATTURA: {descrizione}..."
+)
+
+# Fattura has no tipo_servizio field, so the transaction prompt always uses this value
+_DEFAULT_TIPO_SERVIZIO = 'Servizio professionale'
+
+# Fallback texts for payments that should not mention the invoice number
+_FALLBACK_DETTAGLIO_GENERIC = "BONIFICO SEPA - Pagamento servizi"
+_FALLBACK_CAUSALE_GENERIC = "Pagamento servizi"
+
+_TRANSACTION_WITHOUT_NUMBER_ATTR_TMPL = (
+    "BENEFICIARIO: {prestatore}\n"
+    "IMPORTO: €{importo:.2f}\n"
+    "DESCRIZIONE_FATTURA: {descrizione}...\n"
+    "TIPO_SERVIZIO: {tipo_servizio}"
+)
+
+# Realistic bank-statement texts rendered locally, without an LLM call, for the
+# template fast path; placeholders are filled from the invoice and the amount
+TRANSACTION_TEMPLATES = {
+    'with_number': {
+        'dettagli': [
+            "BONIFICO SEPA - Pagamento fattura n. {numero_fattura}",
+            "BON.UE {prestatore} - Saldo fatt. n. {numero_fattura} del {data_emissione}",
+            "Bonifico da Voi disposto a favore di: {prestatore} - Fatt. n. {numero_fattura}",
+            "DISP.BEU {prestatore} Rif. fattura {numero_fattura} importo EUR {importo}",
+        ],
+        'causali': [
+            "Pagamento fattura {numero_fattura}",
+            "Saldo fatt. n. {numero_fattura} del {data_emissione}",
+            "Fatt. n. {numero_fattura}",
+        ],
+    },
+    'without_number': {
+        'dettagli': [
+            "BONIFICO SEPA - Pagamento servizi",
+            "Bonifico da Voi disposto a favore di: {prestatore}",
+            "BON.UE {prestatore} - Pagamento prestazioni professionali",
+            "DISP.BEU {prestatore} importo EUR {importo}",
+        ],
+        'causali': [
+            "Pagamento servizi",
+            "Saldo prestazioni",
+            "Pagamento competenze {prestatore}",
+            "Pagamento fornitura",
+        ],
+    },
+}
+
+_ITALIAN_NUMBER_TRANS = str.maketrans({',': '.', '.': ','})
+
+# Placeholders each template needs, parsed once so rendering builds only those values
+_COMPILED_TEMPLATES = {
+    kind: {
+        section: [
+            (tpl, frozenset(name for _, name, _, _ in string.Formatter().parse(tpl) if name))
+            for tpl in section_templates
+        ]
+        for section, section_templates in templates.items()
+    }
+    for kind, templates in TRANSACTION_TEMPLATES.items()
+}
+
+_TEMPLATE_FIELDS = {
+    'prestatore': lambda fattura, importo: fattura.prestatore,
+    'numero_fattura': lambda fattura, importo: fattura.numero_fattura,
+    'data_emissione': lambda fattura, importo: fattura.data_emissione.strftime('%d/%m/%Y'),
+    'importo': lambda fattura, importo: f"{importo:,.2f}".translate(_ITALIAN_NUMBER_TRANS),
+}
+
+def _render_template(compiled, fattura: Fattura, importo: float) -> str:
+    tpl, names = compiled
+    if not names:
+        return tpl
+    values = {}
+    for name in names:
+        getter = _TEMPLATE_FIELDS.get(name)
+        values[name] = getter(fattura, importo) if getter is not None else "N/A"
+    return tpl.format_map(values)
+
+# Request bodies for the Batch API carry the same strict schemas as the live calls
+_BATCH_ROLES = {"system": "system", "human": "user"}
+_INVOICE_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "AIInvoiceOutput", "schema": AIInvoiceOutput.model_json_schema(), "strict": True}
+}
+_TRANSACTION_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "AITransactionOutput", "schema": AITransactionOutput.model_json_schema(), "strict": True}
+}
+
+# Fingerprint of everything that shapes a cached text, so editing a prompt or an output
+# schema starts a fresh cache namespace instead of reading texts written for the old one
+_PROMPT_VERSION = hashlib.sha256(repr((
+    INVOICE_MSGS, TRANSACTION_WITH_NUMBER_MSGS, TRANSACTION_WITHOUT_NUMBER_MSGS,
+    _INVOICE_ATTR_TMPL, _TRANSACTION_WITH_NUMBER_ATTR_TMPL, _TRANSACTION_WITHOUT_NUMBER_ATTR_TMPL,
+    _INVOICE_RESPONSE_FORMAT, _TRANSACTION_RESPONSE_FORMAT,
+)).encode()).hexdigest()[:16]
+
+def _parse_batch_output(content: Optional[str], output_model):
+    if content is None:
+        return None
+    try:
+        return output_model.model_validate_json(content)
+    except ValidationError as e:
+        logger.error("Invalid batch output: %s", e)
+        return None
+
+def _round_robin(chains: List):
+    """Single runnable dealing each call to the next of several equivalent chains"""
+    if len(chains) == 1:
+        return chains[0]
+    from langchain_core.runnables import RunnableLambda
+    turn = itertools.cycle(chains)
+    
+    def invoke(inputs, config):
+        return next(turn).invoke(inputs, config)
+    
+    async def ainvoke(inputs, config):
+        return await next(turn).ainvoke(inputs, config)
+    
+    return RunnableLambda(invoke, afunc=ainvoke, name="round_robin")
+
+def _run_sync(coro):
+    """Run an async batch method to completion from synchronous code."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    coro.close()
+    name = coro.__qualname__.rsplit('.', 1)[-1]
+    raise RuntimeError(f"{name[1:]} cannot run inside a running event loop; await {name} instead")
+
+class AITextGenerator:
+    """Handles AI-powered text generation for invoices and transactions"""
+    
+    def __init__(self, azure_endpoint: Union[str, Sequence[str]], api_version: str = "2024-08-01-preview", 
+                 model: str = "gpt-4o", temperature: float = 0.7,
+                 max_concurrency: int = 16, max_retries: int = 2, seed: Optional[int] = None,
+                 cache_size: int = 0, cache_bypass_probability: float = 0.0,
+                 cache_path: Optional[str] = None,
+                 invoice_max_tokens: int = 256, transaction_max_tokens: int = 180,
+                 template_fraction: float = 0.0, top_p: Optional[float] = None,
+                 requests_per_second: Optional[float] = None,
+                 template_max_amount: Optional[float] = None):
+        # langchain is only loaded once a generator is built, keeping it off the package import path
+        from langchain_openai import AzureChatOpenAI
+        from langchain.prompts import ChatPromptTemplate
+        from langchain_core.rate_limiters import InMemoryRateLimiter
+        
+        # Several endpoints (deployments) can be given to spread the load past a single quota;
+        # requests are then dealt out round-robin, each endpoint with its own client
+        endpoints = [azure_endpoint] if isinstance(azure_endpoint, str) else list(azure_endpoint)
+        
+        def make_llm(endpoint: str):
+            # Optional token bucket spacing requests below the deployment quota, rather than
+            # waiting for 429s to trigger the client's backoff
+            rate_limiter = None
+            if requests_per_second is not None:
+                rate_limiter = InMemoryRateLimiter(
+                    requests_per_second=requests_per_second,
+                    check_every_n_seconds=0.1,
+                    max_bucket_size=max(1, max_concurrency)
+                )
+            return AzureChatOpenAI(
+                azure_endpoint=endpoint,
+                openai_api_version=api_version,
+                deployment_name=model,
+                openai_api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+                temperature=temperature,
+                top_p=top_p,
+                seed=seed,  # best-effort reproducible sampling on the OpenAI side
+                max_retries=max_retries,  # the OpenAI client backs off on 429/5xx responses
+                rate_limiter=rate_limiter
+            )
+        
+        self.llms = [make_llm(endpoint) for endpoint in endpoints]
+        self.llm = self.llms[0]
+        # Strict JSON schemas of only the text fields used below: the model emits nothing else,
+        # and the response is parsed straight into the output model
+        # Outputs are short JSON objects; capping the completion length bounds the generation latency
+        invoice_llms = [
+            llm.model_copy(update={'max_tokens': invoice_max_tokens}).with_structured_output(
+                AIInvoiceOutput, method="json_schema", strict=True
+            )
+            for llm in self.llms
+        ]
+        trans_llms = [
+            llm.model_copy(update={'max_tokens': transaction_max_tokens}).with_structured_output(
+                AITransactionOutput, method="json_schema", strict=True
+            )
+            for llm in self.llms
+        ]
+        pair_llms = [
+            llm.model_copy(update={'max_tokens': invoice_max_tokens + transaction_max_tokens}).with_structured_output(
+                AIPairOutput, method="json_schema", strict=True
+            )
+            for llm in self.llms
+        ]
+        self.llm_invoice = invoice_llms[0]
+        self.llm_trans = trans_llms[0]
+        self._invoice_max_tokens = invoice_max_tokens
+        self._transaction_max_tokens = transaction_max_tokens
+        # In-flight requests per batch call, shared by the prompt variants a call runs side by side
+        self.max_concurrency = max_concurrency
+        self._random = random.Random(seed)
+        
+        # Optional exact-match cache of LLM texts keyed by the prompt attributes (disabled when cache_size is 0);
+        # a small bypass probability still sends some repeated keys to the LLM to keep the texts varied
+        # cache_path additionally persists the texts across runs, keyed by the sampling settings
+        # and the prompt version
+        if cache_size > 0 or cache_path is not None:
+            self.cache = ResponseCache(
+                cache_size or 10_000, path=cache_path,
+                namespace=f"{model}|{temperature}|{top_p}|{seed}|{_PROMPT_VERSION}"
+            )
         else:
-            prompt_template = ChatPromptTemplate.from_messages([
-                ("system", """Genera una transazione bancaria italiana realistica.
-                
-                IMPORTANTE:
-                - Il dettaglio deve essere tipico dei bonifici italiani
-                - La causale deve essere concisa e professionale
-                - La controparte può essere uguale o leggermente diversa dal beneficiario
-                - Usa terminologia bancaria italiana standard
-                - NON includere il numero fattura - usa solo descrizioni generiche del servizio
-                """),
-                ("human", "Attributi transazione:\n{attributi_transazione}")
-            ])
-            
-            attributi_transazione = f"""
-            BENEFICIARIO: {fattura.prestatore}
-            IMPORTO: €{importo:.2f}
-            DESCRIZIONE_FATTURA: {fattura.descrizione[:100]}...
-            TIPO_SERVIZIO: {getattr(fattura, 'tipo_servizio', 'Servizio professionale')}
-            """
-        
-        chain = prompt_template | self.llm_trans
+            self.cache = None
+        self.cache_bypass_probability = cache_bypass_probability
+        # Share of transactions rendered from TRANSACTION_TEMPLATES instead of asking the LLM
+        self.template_fraction = template_fraction
+        # Payments up to this amount are predictable enough to always come from the templates
+        self.template_max_amount = template_max_amount
         
+        # Prompts and chains are immutable, so build them once and reuse them for every call
+        self._invoice_prompt = ChatPromptTemplate.from_messages(INVOICE_MSGS)
+        self._trans_prompt_with = ChatPromptTemplate.from_messages(TRANSACTION_WITH_NUMBER_MSGS)
+        self._trans_prompt_without = ChatPromptTemplate.from_messages(TRANSACTION_WITHOUT_NUMBER_MSGS)
+        self._invoice_chain = _round_robin([self._invoice_prompt | llm for llm in invoice_llms])
+        self._trans_chain_with = _round_robin([self._trans_prompt_with | llm for llm in trans_llms])
+        self._trans_chain_without = _round_robin([self._trans_prompt_without | llm for llm in trans_llms])
+        self._pair_chain_with = _round_robin([ChatPromptTemplate.from_messages(PAIR_WITH_NUMBER_MSGS) | llm for llm in pair_llms])
+        self._pair_chain_without = _round_robin([ChatPromptTemplate.from_messages(PAIR_WITHOUT_NUMBER_MSGS) | llm for llm in pair_llms])
+    
+    def _format_transaction_attributes(self, fattura: Fattura, importo: float,
+                                       include_invoice_number: bool) -> str:
+        """Format the transaction attributes sent in the human message"""
+        template = _TRANSACTION_WITH_NUMBER_ATTR_TMPL if include_invoice_number else _TRANSACTION_WITHOUT_NUMBER_ATTR_TMPL
+        return template.format_map({
+            'prestatore': fattura.prestatore,
+            'importo': importo,
+            'numero_fattura': fattura.numero_fattura,
+            'descrizione': fattura.descrizione_short,
+            'tipo_servizio': _DEFAULT_TIPO_SERVIZIO
+        })
+    
+    def _invoice_cache_key(self, inv: Dict) -> Tuple:
+        # Amounts are bucketed to 10 EUR so near-identical invoices share an entry; descriptions
+        # may mention dates, so entries are only reused within the same emission month
+        return ('invoice', inv['settore'], inv['prestatore'], inv['tipo_servizio'], round(inv['importo'], -1),
+                str(inv['data_emissione'])[:7])
+    
+    def _transaction_cache_key(self, fattura: Fattura, importo: float, include_invoice_number: bool) -> Tuple:
+        # Texts that quote the invoice number are only reusable for that same invoice
+        numero_fattura = fattura.numero_fattura if include_invoice_number else None
+        return ('transaction', fattura.prestatore, include_invoice_number, numero_fattura, round(importo, -1))
+    
+    def _cache_get(self, key: Tuple) -> Optional[Tuple]:
+        if self.cache is None or self._random.random() < self.cache_bypass_probability:
+            return None
+        return self.cache.get(key)
+    
+    def _cache_put(self, key: Tuple, value: Tuple):
+        if self.cache is not None:
+            self.cache.put(key, value)
+    
+    @contextmanager
+    def use_random(self, rng: random.Random):
+        """Make the template and cache-bypass draws inside the block with rng instead of the seeded default"""
+        saved, self._random = self._random, rng
         try:
-            response: Transazione = chain.invoke({"attributi_transazione": attributi_transazione})
-            return response.dettaglio, response.causale, response.controparte, include_invoice_number
+            yield
+        finally:
+            self._random = saved
+    
+    def close(self):
+        """Close the persistent response cache, if any. Later texts are cached in memory only."""
+        if self.cache is not None:
+            self.cache.close()
+    
+    def _use_template(self, importo: float) -> bool:
+        if self.template_max_amount is not None and abs(importo) <= self.template_max_amount:
+            return True
+        return self.template_fraction > 0 and self._random.random() < self.template_fraction
+    
+    def _render_from_template(self, fattura: Fattura, importo: float,
+                              include_invoice_number: bool) -> Tuple[str, str, str, bool]:
+        """Render transaction texts locally from TRANSACTION_TEMPLATES"""
+        templates = _COMPILED_TEMPLATES['with_number' if include_invoice_number else 'without_number']
+        _choice = self._random.choice
+        dettaglio = _render_template(_choice(templates['dettagli']), fattura, importo)
+        causale = _render_template(_choice(templates['causali']), fattura, importo)
+        return dettaglio, causale, fattura.prestatore, include_invoice_number
+    
+    def generate_invoice_data(self, company_id: str, data_emissione: str, settore: str, prestatore: str, 
+                             importo: float, tipo_servizio: str) -> Tuple[str, str]:
+        """Generate realistic invoice description and committente"""
+        inv = {
+            'data_emissione': data_emissione, 'settore': settore, 'prestatore': prestatore,
+            'importo': importo, 'tipo_servizio': tipo_servizio
+        }
+        key = self._invoice_cache_key(inv)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
+        try:
+            response: AIInvoiceOutput = self._invoice_chain.invoke({"attributi_fattura": _INVOICE_ATTR_TMPL.format_map(inv)})
+        except Exception as e:
+            logger.error("Error generating invoice data: %s", e)
+            return self._get_fallback_invoice_data(tipo_servizio)
+        result = (response.descrizione, response.committente)
+        self._cache_put(key, result)
+        return result
+    
+    def generate_transaction_data(self, fattura: Fattura, importo: float, 
+                                invoice_number_probability: float = 0.1,
+                                include_invoice_number: Optional[bool] = None) -> Tuple[str, str, str, bool]:
+        """Generate realistic transaction dettaglio, causale and controparte
+        
+        include_invoice_number can be passed in already drawn, e.g. by the caller for
+        a whole batch; otherwise it is drawn here.
+        """
+        if include_invoice_number is None:
+            include_invoice_number = self._random.random() < invoice_number_probability
+        if self._use_template(importo):
+            return self._render_from_template(fattura, importo, include_invoice_number)
+        
+        key = self._transaction_cache_key(fattura, importo, include_invoice_number)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return (*cached, include_invoice_number)
+        
+        attributi_transazione = self._format_transaction_attributes(fattura, importo, include_invoice_number)
+        chain = self._trans_chain_with if include_invoice_number else self._trans_chain_without
+        
+        try:
+            response: AITransactionOutput = chain.invoke({"attributi_transazione": attributi_transazione})
         except Exception as e:
-            logger.error(f"Error generating transaction data: {e}")
+            logger.error("Error generating transaction data: %s", e)
             return self._get_fallback_transaction_data(fattura, include_invoice_number)
+        self._cache_put(key, (response.dettaglio, response.causale, response.controparte))
+        return response.dettaglio, response.causale, response.controparte, include_invoice_number
+    
+    def _batch_request_body(self, prompt, variables: Dict, response_format: Dict, max_tokens: int) -> Dict:
+        """Chat completion request body for the Batch API, equivalent to a live chain call"""
+        body = {
+            "model": self.llm.deployment_name,
+            "messages": [
+                {"role": _BATCH_ROLES[m.type], "content": m.content}
+                for m in prompt.format_messages(**variables)
+            ],
+            "response_format": response_format,
+            "max_tokens": max_tokens
+        }
+        for name in ("temperature", "top_p", "seed"):
+            value = getattr(self.llm, name)
+            if value is not None:
+                body[name] = value
+        return body
+    
+    def _run_batch_job(self, bodies: List[Dict], poll_interval: float) -> List[Optional[str]]:
+        """run_chat_batch_job, treating a job that cannot be submitted or polled as all requests failed"""
+        try:
+            return run_chat_batch_job(self.llm.root_client, bodies, poll_interval=poll_interval)
+        except Exception as e:
+            logger.error("Batch job error: %s", e)
+            return [None] * len(bodies)
+    
+    def generate_invoice_data_bulk(self, invoices: List[Dict],
+                                   poll_interval: float = 30.0) -> List[Tuple[str, str]]:
+        """Same as generate_invoice_data_batch, but through the discounted Batch API.
+        
+        Blocks until the batch job completes (up to its 24h window), so it is meant
+        for offline runs where cost matters more than latency. Requests the job fails
+        to answer, or all of them if it cannot be submitted, are resent as live calls.
+        """
+        results = [None] * len(invoices)
+        keys = [self._invoice_cache_key(inv) for inv in invoices]
+        pending = []
+        for i, (inv, key) in enumerate(zip(invoices, keys)):
+            cached = self._cache_get(key)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+        
+        bodies = [
+            self._batch_request_body(
+                self._invoice_prompt, {"attributi_fattura": _INVOICE_ATTR_TMPL.format_map(invoices[i])},
+                _INVOICE_RESPONSE_FORMAT, self._invoice_max_tokens
+            )
+            for i in pending
+        ]
+        contents = self._run_batch_job(bodies, poll_interval)
+        
+        failed = []
+        for i, content in zip(pending, contents):
+            response = _parse_batch_output(content, AIInvoiceOutput)
+            if response is None:
+                failed.append(i)
+            else:
+                results[i] = (response.descrizione, response.committente)
+                self._cache_put(keys[i], results[i])
+        if failed:
+            # Requests the job did not answer are sent live, with the usual per-item fallback
+            logger.warning("Resending %d failed batch requests as live calls", len(failed))
+            for i, result in zip(failed, self.generate_invoice_data_batch([invoices[i] for i in failed])):
+                results[i] = result
+        return results
+    
+    def generate_transaction_data_bulk(self, transactions: List[Dict],
+                                       poll_interval: float = 30.0) -> List[Tuple[str, str, str, bool]]:
+        """Same as generate_transaction_data_batch, but through the discounted Batch API"""
+        results = [None] * len(transactions)
+        keys = [
+            self._transaction_cache_key(t['fattura'], t['importo'], t['include_invoice_number'])
+            for t in transactions
+        ]
+        pending = []
+        for i, (t, key) in enumerate(zip(transactions, keys)):
+            if self._use_template(t['importo']):
+                results[i] = self._render_from_template(t['fattura'], t['importo'], t['include_invoice_number'])
+                continue
+            cached = self._cache_get(key)
+            if cached is not None:
+                results[i] = (*cached, t['include_invoice_number'])
+            else:
+                pending.append(i)
+        
+        bodies = []
+        for i in pending:
+            t = transactions[i]
+            prompt = self._trans_prompt_with if t['include_invoice_number'] else self._trans_prompt_without
+            attributi = self._format_transaction_attributes(t['fattura'], t['importo'], t['include_invoice_number'])
+            bodies.append(self._batch_request_body(
+                prompt, {"attributi_transazione": attributi},
+                _TRANSACTION_RESPONSE_FORMAT, self._transaction_max_tokens
+            ))
+        contents = self._run_batch_job(bodies, poll_interval)
+        
+        failed = []
+        for i, content in zip(pending, contents):
+            t = transactions[i]
+            response = _parse_batch_output(content, AITransactionOutput)
+            if response is None:
+                failed.append(i)
+            else:
+                self._cache_put(keys[i], (response.dettaglio, response.causale, response.controparte))
+                results[i] = (response.dettaglio, response.causale, response.controparte, t['include_invoice_number'])
+        if failed:
+            logger.warning("Resending %d failed batch requests as live calls", len(failed))
+            for i, result in zip(failed, self.generate_transaction_data_batch([transactions[i] for i in failed])):
+                results[i] = result
+        return results
+    
+    def generate_invoice_data_batch(self, invoices: List[Dict]) -> List[Tuple[str, str]]:
+        """Generate invoice data for many invoices with concurrent LLM calls.
+        
+        Each item holds the keyword arguments of generate_invoice_data; results
+        are returned in the same order.
+        """
+        return _run_sync(self.agenerate_invoice_data_batch(invoices))
+    
+    async def agenerate_invoice_data_batch(self, invoices: List[Dict]) -> List[Tuple[str, str]]:
+        """Async version of generate_invoice_data_batch"""
+        results = [None] * len(invoices)
+        keys = [self._invoice_cache_key(inv) for inv in invoices]
+        pending = []
+        # With the cache enabled, a key repeated within the batch is requested only once
+        dedupe = self.cache is not None
+        seen = set()
+        duplicates = []
+        for i, (inv, key) in enumerate(zip(invoices, keys)):
+            cached = self._cache_get(key)
+            if cached is not None:
+                results[i] = cached
+            elif dedupe and key in seen:
+                duplicates.append(i)
+            else:
+                seen.add(key)
+                pending.append(i)
+        
+        inputs = [
+            {"attributi_fattura": _INVOICE_ATTR_TMPL.format_map(invoices[i])}
+            for i in pending
+        ]
+        responses = await self._invoice_chain.abatch(
+            inputs, config={"max_concurrency": self.max_concurrency}, return_exceptions=True
+        )
+        
+        generated = {}
+        for i, response in zip(pending, responses):
+            inv = invoices[i]
+            if isinstance(response, Exception):
+                logger.error("Error generating invoice data: %s", response)
+                results[i] = self._get_fallback_invoice_data(inv['tipo_servizio'])
+            else:
+                results[i] = generated[keys[i]] = (response.descrizione, response.committente)
+                self._cache_put(keys[i], results[i])
+        
+        # Repeated keys reuse the texts of their first occurrence, as a cache hit would
+        for i in duplicates:
+            inv = invoices[i]
+            shared = generated.get(keys[i])
+            if shared is not None:
+                results[i] = shared
+            else:
+                results[i] = self._get_fallback_invoice_data(inv['tipo_servizio'])
+        return results
+    
+    def generate_transaction_data_batch(self, transactions: List[Dict]) -> List[Tuple[str, str, str, bool]]:
+        """Generate transaction data for many payments with concurrent LLM calls.
+        
+        Each item holds 'fattura', 'importo' and 'include_invoice_number'; results
+        are returned in the same order.
+        """
+        return _run_sync(self.agenerate_transaction_data_batch(transactions))
+    
+    async def agenerate_transaction_data_batch(self, transactions: List[Dict]) -> List[Tuple[str, str, str, bool]]:
+        """Async version of generate_transaction_data_batch"""
+        results = [None] * len(transactions)
+        async for i, result in self.agenerate_transaction_data_stream(transactions):
+            results[i] = result
+        return results
     
-    def _get_fallback_invoice_data(self, tipo_servizio: str, data_emissione) -> Tuple[str, str, str]:
+    async def agenerate_transaction_data_stream(
+        self, transactions: List[Dict]
+    ) -> AsyncIterator[Tuple[int, Tuple[str, str, str, bool]]]:
+        """Yield (index, transaction data) pairs as soon as each item is ready.
+        
+        Template and cache hits come first, then the LLM responses in completion order,
+        so a consumer can process or write rows while the remaining requests are in flight.
+        """
+        keys = [
+            self._transaction_cache_key(t['fattura'], t['importo'], t['include_invoice_number'])
+            for t in transactions
+        ]
+        idx_with = []
+        idx_without = []
+        # Hoisted out of the loop, which runs once per transaction of the batch
+        use_template = self._use_template
+        render_from_template = self._render_from_template
+        cache_get = self._cache_get
+        # With the cache enabled, a key repeated within the batch is requested only once
+        dedupe = self.cache is not None
+        seen = set()
+        duplicates = []
+        for i, (t, key) in enumerate(zip(transactions, keys)):
+            if use_template(t['importo']):
+                yield i, render_from_template(t['fattura'], t['importo'], t['include_invoice_number'])
+                continue
+            cached = cache_get(key)
+            if cached is not None:
+                yield i, (*cached, t['include_invoice_number'])
+            elif dedupe and key in seen:
+                duplicates.append(i)
+            else:
+                seen.add(key)
+                (idx_with if t['include_invoice_number'] else idx_without).append(i)
+        
+        def build_inputs(indices: List[int], include_invoice_number: bool) -> List[Dict]:
+            return [
+                {"attributi_transazione": self._format_transaction_attributes(
+                    transactions[i]['fattura'], transactions[i]['importo'], include_invoice_number
+                )}
+                for i in indices
+            ]
+        
+        concurrency_with, concurrency_without = self._split_concurrency(len(idx_with), len(idx_without))
+        generated = {}
+        ready = asyncio.Queue()
+        
+        async def consume(chain, indices: List[int], include_invoice_number: bool, max_concurrency: int):
+            # Each response is handed over as soon as it arrives, not after the slowest one
+            try:
+                async for j, response in chain.abatch_as_completed(
+                    build_inputs(indices, include_invoice_number),
+                    config={"max_concurrency": max_concurrency}, return_exceptions=True
+                ):
+                    i = indices[j]
+                    if isinstance(response, Exception):
+                        logger.error("Error generating transaction data: %s", response)
+                        result = self._get_fallback_transaction_data(transactions[i]['fattura'], include_invoice_number)
+                    else:
+                        generated[keys[i]] = (response.dettaglio, response.causale, response.controparte)
+                        self._cache_put(keys[i], generated[keys[i]])
+                        result = (*generated[keys[i]], include_invoice_number)
+                    ready.put_nowait((i, result))
+            finally:
+                ready.put_nowait(None)
+        
+        # The two prompt variants are independent, so both groups run concurrently within one budget
+        tasks = [
+            asyncio.create_task(consume(self._trans_chain_with, idx_with, True, concurrency_with)),
+            asyncio.create_task(consume(self._trans_chain_without, idx_without, False, concurrency_without))
+        ]
+        try:
+            running = len(tasks)
+            while running:
+                item = await ready.get()
+                if item is None:
+                    running -= 1
+                else:
+                    yield item
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        # Repeated keys reuse the texts of their first occurrence, as a cache hit would
+        for i in duplicates:
+            t = transactions[i]
+            shared = generated.get(keys[i])
+            if shared is not None:
+                yield i, (*shared, t['include_invoice_number'])
+            else:
+                yield i, self._get_fallback_transaction_data(t['fattura'], t['include_invoice_number'])
+    
+    def generate_pair_data_batch(self, pairs: List[Dict]) -> List[Tuple[Tuple[str, str], Tuple[str, str, str, bool]]]:
+        """Invoice and payment texts of a batch of 1:1 pairs, one LLM call per pair.
+        
+        Each pair is an invoice attribute dict (as for generate_invoice_data_batch) plus
+        numero_fattura and include_invoice_number; the payment is taken to settle the full
+        amount. Returns ((descrizione, committente), (dettaglio, causale, controparte,
+        include_invoice_number)) per pair, in input order. The cache and the templates
+        are not used on this path.
+        """
+        return _run_sync(self.agenerate_pair_data_batch(pairs))
+    
+    async def agenerate_pair_data_batch(self, pairs: List[Dict]) -> List[Tuple[Tuple[str, str], Tuple[str, str, str, bool]]]:
+        """Async version of generate_pair_data_batch"""
+        results = [None] * len(pairs)
+        idx_with = [i for i, p in enumerate(pairs) if p['include_invoice_number']]
+        idx_without = [i for i, p in enumerate(pairs) if not p['include_invoice_number']]
+        concurrency_with, concurrency_without = self._split_concurrency(len(idx_with), len(idx_without))
+        
+        async def run(chain, indices: List[int], include_invoice_number: bool, max_concurrency: int):
+            responses = await chain.abatch(
+                [{"attributi_fattura": _PAIR_ATTR_TMPL.format_map(pairs[i])} for i in indices],
+                config={"max_concurrency": max_concurrency}, return_exceptions=True
+            )
+            for i, response in zip(indices, responses):
+                p = pairs[i]
+                if isinstance(response, Exception):
+                    logger.error("Error generating invoice/payment pair: %s", response)
+                    results[i] = (
+                        self._get_fallback_invoice_data(p['tipo_servizio']),
+                        self._fallback_transaction_texts(p['numero_fattura'], p['prestatore'], include_invoice_number)
+                    )
+                else:
+                    fattura, transazione = response.fattura, response.transazione
+                    results[i] = (
+                        (fattura.descrizione, fattura.committente),
+                        (transazione.dettaglio, transazione.causale, transazione.controparte, include_invoice_number)
+                    )
+        
+        await asyncio.gather(
+            run(self._pair_chain_with, idx_with, True, concurrency_with),
+            run(self._pair_chain_without, idx_without, False, concurrency_without)
+        )
+        return results
+    
+    def _split_concurrency(self, n_with: int, n_without: int) -> Tuple[int, int]:
+        """Share max_concurrency between the two prompt variants of a batch, in proportion to their sizes."""
+        if not n_with or not n_without:
+            return self.max_concurrency, self.max_concurrency
+        # Each variant keeps at least one request in flight
+        share_with = round(self.max_concurrency * n_with / (n_with + n_without))
+        share_with = min(max(share_with, 1), max(self.max_concurrency - 1, 1))
+        return share_with, max(self.max_concurrency - share_with, 1)
+    
+    def _get_fallback_invoice_data(self, tipo_servizio: str) -> Tuple[str, str]:
         """Generate fallback invoice data when AI generation fails"""
         fallback_descriptions = {
             "trasporto": "Servizi trasporto merci c/terzi - Rif. DDT N. 125/2024",
@@ -136,26 +790,21 @@ class AITextGenerator:
             tipo_servizio.lower(), 
             f"Prestazione {tipo_servizio} - Rif. contratto"
         )
-        # Ensure data_emissione is a datetime object
-        if isinstance(data_emissione, str):
-            try:
-                data_emissione_dt = datetime.strptime(data_emissione, "%Y-%m-%d")
-            except Exception:
-                data_emissione_dt = datetime.now()
-        else:
-            data_emissione_dt = data_emissione
-        fallback_numero = f"FT{data_emissione_dt.year}/{random.randint(1000, 9999)}"
-        return fallback_desc, "BETA SOLUTIONS SRL", fallback_numero
+        return fallback_desc, "BETA SOLUTIONS SRL"
     
     def _get_fallback_transaction_data(self, fattura: Fattura, include_invoice_number: bool) -> Tuple[str, str, str, bool]:
         """Generate fallback transaction data when AI generation fails"""
+        return self._fallback_transaction_texts(fattura.numero_fattura, fattura.prestatore, include_invoice_number)
+    
+    def _fallback_transaction_texts(self, numero_fattura: str, prestatore: str,
+                                    include_invoice_number: bool) -> Tuple[str, str, str, bool]:
         if include_invoice_number:
-            fallback_dettaglio = f"BONIFICO SEPA - Pagamento fattura n. {fattura.numero_fattura}"
-            fallback_causale = f"Pagamento fattura {fattura.numero_fattura}"
+            fallback_dettaglio = f"BONIFICO SEPA - Pagamento fattura n. {numero_fattura}"
+            fallback_causale = f"Pagamento fattura {numero_fattura}"
         else:
-            service_type = getattr(fattura, 'tipo_servizio', 'servizi')
-            fallback_dettaglio = f"BONIFICO SEPA - Pagamento {service_type}"
-            fallback_causale = f"Pagamento {service_type}"
+            # Fattura has no tipo_servizio, so these are always the generic service texts
+            fallback_dettaglio = _FALLBACK_DETTAGLIO_GENERIC
+            fallback_causale = _FALLBACK_CAUSALE_GENERIC
         
-        fallback_controparte = fattura.prestatore
+        fallback_controparte = prestatore
         return fallback_dettaglio, fallback_causale, fallback_controparte, include_invoice_number
\ No newline at end of file
@@ -1,33 +1,202 @@
 import os
+import gc
+import calendar
 import json
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from datetime import date, datetime, time, timedelta
 import random
 import uuid
-from typing import Dict, List, Tuple, Optional
-from faker import Faker
+from collections import defaultdict
+from contextlib import contextmanager
+from itertools import chain
+from typing import Dict, List, Tuple, Optional, Union
 import logging
 
 from ..core.data_models import Fattura, Transazione
 from ..core.data_types import MatchType, QualityLevel, TimingPattern, AmountPattern, GroundTruth
-from dataclasses import asdict
+from dataclasses import asdict, fields
 from ..core.exceptions import ValidationError
+from ..config.settings import GeneratorConfig
 from .ai_text_generator import AITextGenerator
 from ..utils.file_utils import check_write_permission
 from ..utils.export_utils import csv_to_xlsx_sheets
+from ..utils.shard_utils import ParquetShardWriter
+from ..utils.history_utils import InvoiceHistory
 
 logger = logging.getLogger(__name__)
 
+def _as_datetime(value: date) -> datetime:
+    """Midnight datetime for a generated date, matching what model validation would produce."""
+    return datetime.combine(value, time.min)
+
+def _shift_months(value: date, months: int) -> date:
+    """Move a date by whole months, clamping the day to the month length as relativedelta does."""
+    year, month = divmod(value.year * 12 + value.month - 1 + months, 12)
+    month += 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+# Output table columns, in model field order, with the dtypes set once per table
+_FATTURA_COLUMNS = tuple(Fattura.model_fields)
+_TRANSAZIONE_COLUMNS = tuple(Transazione.model_fields)
+_GROUND_TRUTH_COLUMNS = tuple(f.name for f in fields(GroundTruth))
+_FATTURA_DTYPES = {'data_emissione': 'datetime64[us]', 'data_scadenza': 'datetime64[us]', 'importo': 'float64'}
+_TRANSAZIONE_DTYPES = {'data': 'datetime64[us]', 'importo': 'float64', 'invoice_number': 'bool'}
+_GROUND_TRUTH_DTYPES = {'confidence': 'float64', 'amount_covered': 'float64'}
+
+def _records_to_frame(records: List, columns: Tuple[str, ...], dtypes: Dict[str, str]) -> pd.DataFrame:
+    """Build a DataFrame column by column from record attributes, without a dict per row."""
+    frame = pd.DataFrame({column: [getattr(record, column) for record in records] for column in columns})
+    return frame.astype(dtypes)
+
+def _to_arrow(df: pd.DataFrame) -> pa.Table:
+    """Arrow table of df with extension columns (e.g. UUID ids) as their text form, like the other id columns."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if isinstance(field.type, pa.BaseExtensionType):
+            table = table.set_column(i, field.name, pa.array(df[field.name].astype(str), pa.string()))
+    return table
+
+def _csv_column(column: pd.Series, array: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Arrow column formatted the way to_csv writes it, where pyarrow's writer would differ."""
+    if pa.types.is_timestamp(array.type):
+        # Timestamps holding only midnights are written as plain dates, whole seconds without a fraction
+        values = column.dropna()
+        if (values == values.dt.normalize()).all():
+            return array.cast(pa.date32())
+        if (values == values.dt.floor('s')).all():
+            return array.cast(pa.timestamp('s', array.type.tz))
+    elif pa.types.is_boolean(array.type):
+        return pc.if_else(array, "True", "False")
+    elif pa.types.is_floating(array.type):
+        # pyarrow writes 1.0 as "1", which would read back as an integer
+        text = array.cast(pa.string())
+        return pc.if_else(pc.match_substring_regex(text, r"^-?\d+$"),
+                          pc.binary_join_element_wise(text, ".0", ""), text)
+    return array
+
+def _write_csv(df: pd.DataFrame, path: str):
+    """Write df as CSV with pyarrow's multithreaded writer.
+
+    Dates, booleans and whole-valued floats are formatted as to_csv writes
+    them, so the file reads back with pd.read_csv to the same values and
+    dtypes. It is not byte-identical to to_csv: pyarrow quotes every string
+    field and header name.
+    """
+    table = _to_arrow(df)
+    for i, field in enumerate(table.schema):
+        table = table.set_column(i, field.name, _csv_column(df[field.name], table.column(i)))
+    pacsv.write_csv(table, path)
+
+_FAKER_POOL_SIZE = 512
+
+# Client name suffixes per sector
+_CLIENT_NAME_SUFFIXES = {
+    "Consulenza IT": ("Tech", "Systems", "Solutions", "Digital"),
+    "Ingegneria": ("Tech", "Systems", "Solutions", "Digital"),
+    "Servizi Legali": ("& Partners", "Associati", "Studio"),
+    "Contabilità": ("& Partners", "Associati", "Studio"),
+    "Marketing": ("Media", "Creative", "Brand", "Communications"),
+}
+_DEFAULT_CLIENT_NAME_SUFFIXES = ("Group", "SPA", "SRL")
+
+# Words appended to generated company names of some sectors
+_TECH_WORDS = ("Tech", "Digital", "Systems", "Solutions", "Software")
+_MARKETING_WORDS = ("Creative", "Media", "Brand", "Communications")
+
+# Scenario count field of the config and the generator method producing it, in generation order
+_SCENARIO_GENERATORS = (
+    ('perfect_1_1', 'generate_scenario_1_1_perfect'),
+    ('installments_1_n', 'generate_scenario_1_n_installments'),
+    ('group_payment_n_1', 'generate_scenario_n_1_group_payment'),
+    ('standalone_invoices', 'generate_scenario_standalone_invoices'),
+    ('standalone_payments', 'generate_scenario_standalone_payments'),
+)
+
+# Group payment texts, completed with the invoice numbers or the period reference
+_GROUP_DETTAGLIO_NUMBERS = "BONIFICO SEPA - Pagamento fatture n. "
+_GROUP_DETTAGLIO_PERIOD = "BONIFICO SEPA - Pagamento fatture periodo "
+_GROUP_CAUSALE = "Pagamento fatture "
+_GROUP_DETTAGLIO_MULTIPLE = "BONIFICO SEPA - Pagamento fatture multiple"
+_GROUP_CAUSALE_MULTIPLE = "Pagamento fatture multiple"
+
+_BILLING_PERIODS = ("monthly", "quarterly", "weekly")
+
+# Recurrency pattern flags, in the order of the RecurrencyPatterns probabilities
+_PATTERN_FLAGS = ('has_recurring_clients', 'provides_similar_services', 'has_monthly_services', 'has_project_based')
+
+# Payment/invoice amount ratio range per amount pattern; EXACT pays the invoice amount
+_AMOUNT_MULTIPLIER_RANGES = {
+    AmountPattern.PARTIAL: (0.3, 0.8),
+    AmountPattern.EXCESS: (1.01, 1.1),
+    AmountPattern.DISCOUNT: (0.9, 0.98),
+    AmountPattern.PENALTY: (1.02, 1.05),
+}
+
+# Probability that a payment text mentions the invoice number, per quality level
+_INVOICE_NUMBER_PROBABILITY = {
+    QualityLevel.PERFECT: 0.5,
+    QualityLevel.FUZZY: 0.25,
+    QualityLevel.NOISY: 0.1,
+}
+
+# Payment day offset from the invoice emission date, inclusive, per timing pattern
+_TIMING_OFFSET_RANGES = {
+    TimingPattern.STANDARD: (0, 90),     # 0-90 days after invoice date
+    TimingPattern.DELAYED: (91, 180),    # >90 days after invoice date
+    TimingPattern.EARLY: (-30, -1),      # Before invoice date (advance payment)
+    TimingPattern.SAME_DAY: (0, 0),      # Same day as invoice
+}
+
 class SyntheticDataGenerator:
-    def __init__(self, config: Dict, azure_endpoint: str):
+    def __init__(self, config: Union[Dict, GeneratorConfig], azure_endpoint: Union[str, List[str]]):
         self.config = config
+        # Typed, read-only view of the configuration used by the generation code
+        self.settings = config if isinstance(config, GeneratorConfig) else GeneratorConfig.from_dict(config)
+        # Imported here so that importing the package does not pay for Faker's locale providers
+        from faker import Faker
         self.fake = Faker('it_IT')
-        self.ai_generator = AITextGenerator(azure_endpoint)
+        # Company names are drawn from Faker in bulk and handed out from a pool
+        self._company_name_pool = []
+        # Numeric draws (amounts, offsets) are made per batch with NumPy; scalar draws use
+        # an instance-level random.Random, so a seeded run does not depend on global state
+        self._rng = np.random.default_rng(self.settings.seed)
+        self._random = random.Random(self.settings.seed)
+        if self.settings.seed is not None:
+            self.fake.seed_instance(self.settings.seed)
+        # Each scenario draws from its own child stream of the root seed: NumPy and scalar draws,
+        # the AI generator's template/cache draws and Faker names (with their own name pool).
+        # Its amounts, dates, flags and names then do not depend on how many draws the scenarios
+        # before it consumed; invoice numbers and record ids stay sequential across the run
+        self._scenario_streams = {}
+        for (name, _), stream in zip(_SCENARIO_GENERATORS, self._rng.spawn(len(_SCENARIO_GENERATORS))):
+            seeds = stream.integers(2**63, size=3).tolist()
+            self._scenario_streams[name] = {
+                'rng': stream,
+                'random': random.Random(seeds[0]),
+                'ai_random': random.Random(seeds[1]),
+                'faker_random': random.Random(seeds[2]),
+                'name_pool': [],
+            }
+        self.ai_generator = AITextGenerator(
+            azure_endpoint,
+            max_concurrency=self.settings.max_concurrency,
+            requests_per_second=self.settings.requests_per_second,
+            seed=self.settings.seed,
+            cache_size=self.settings.cache_size,
+            cache_path=self.settings.cache_path,
+            template_fraction=self.settings.template_fraction,
+            template_max_amount=self.settings.template_max_amount
+        )
         self.companies = []
-        self.company_invoice_history = {}  # Track invoice history per company
+        self.company_invoice_history = InvoiceHistory()  # Track invoice history of all companies
         self.recurring_patterns = {}       # Track recurring patterns
+        self._invoice_counters = defaultdict(int)  # Last invoice number per (company, year)
+        self._period_refs = {}  # MM/YYYY strings per (year, month)
         self.sectors = [
             "Consulenza IT", "Servizi Legali", "Marketing", "Contabilità", 
             "Ingegneria", "Architettura", "Formazione", "Logistica"
@@ -47,29 +216,20 @@ class SyntheticDataGenerator:
         self._validate_config()
         
         # Generate companies and initialize history
-        num_companies = self.config.get('num_companies', 20)
-        self.companies = self.generate_companies(num_companies)
-        self._initialize_company_histories()
+        self.companies = self.generate_companies(self.settings.num_companies)
         self._setup_recurrency_patterns()
     
-    def _initialize_company_histories(self):
-        """Initialize invoice history for all companies"""
-        for company in self.companies:
-            company_id = company['id']
-            if company_id not in self.company_invoice_history:
-                self.company_invoice_history[company_id] = []
-    
     def _validate_config(self):
         """Validate that the configuration is consistent"""
-        scenarios = self.config.get('scenarios', {})
-        num_companies = self.config.get('num_companies', 20)
+        scenarios = self.settings.scenarios
+        num_companies = self.settings.num_companies
         
         # Calculate total invoices needed
         total_invoices = (
-            scenarios.get('perfect_1_1', 0) +
-            scenarios.get('installments_1_n', 0) +
-            scenarios.get('group_payment_n_1', 0) * 3 +  # Assume avg 3 invoices per group
-            scenarios.get('standalone_invoices', 0)
+            scenarios.perfect_1_1 +
+            scenarios.installments_1_n +
+            scenarios.group_payment_n_1 * 3 +  # Assume avg 3 invoices per group
+            scenarios.standalone_invoices
         )
         
         # Check if we have enough companies
@@ -83,83 +243,98 @@ class SyntheticDataGenerator:
         
         if num_companies > total_invoices:
             logger.warning(
-                f"Number of companies ({num_companies}) is higher than total invoices ({total_invoices}). "
-                "Some companies may not have any invoices."
+                "Number of companies (%d) is higher than total invoices (%d). "
+                "Some companies may not have any invoices.",
+                num_companies, total_invoices
             )
     
     def _setup_recurrency_patterns(self):
         """Setup recurrency patterns for companies"""
-        recurrency_config = self.config.get('recurrency_patterns', {})
+        recurrency = self.settings.recurrency_patterns
+        n = len(self.companies)
+        
+        # Pattern flags of all companies from one draw
+        thresholds = np.array([
+            recurrency.recurring_clients, recurrency.similar_services,
+            recurrency.monthly_services, recurrency.project_based
+        ])
+        flags = (self._rng.random((n, len(_PATTERN_FLAGS))) < thresholds).tolist()
+        # Random order of each sector's services, to pick the preferred ones from
+        max_services = max(len(services) for services in self.service_types.values())
+        service_orders = np.argsort(self._rng.random((n, max_services)), axis=1).tolist()
         
-        for company in self.companies:
+        for company, company_flags, order in zip(self.companies, flags, service_orders):
             company_id = company['id']
-            self.company_invoice_history[company_id] = []
+            patterns = dict(zip(_PATTERN_FLAGS, company_flags))
             
-            # Determine recurrency patterns for this company
-            patterns = {
-                'has_recurring_clients': random.random() < recurrency_config.get('recurring_clients', 0.3),
-                'provides_similar_services': random.random() < recurrency_config.get('similar_services', 0.4),
-                'has_monthly_services': random.random() < recurrency_config.get('monthly_services', 0.2),
-                'has_project_based': random.random() < recurrency_config.get('project_based', 0.3)
-            }
-            
-            # Define preferred service types for consistency
+            # Define preferred service types for consistency (1-2 preferred services)
             sector_services = self.service_types[company['settore']]
-            patterns['preferred_services'] = random.sample(
-                sector_services, 
-                min(2, len(sector_services))  # 1-2 preferred services
-            )
+            patterns['preferred_services'] = [
+                sector_services[j] for j in order if j < len(sector_services)
+            ][:2]
             
             # Define recurring client names for this company
             if patterns['has_recurring_clients']:
-                patterns['recurring_clients'] = [
-                    self._generate_client_name(company['settore']) 
-                    for _ in range(random.randint(2, 5))
-                ]
+                patterns['recurring_clients'] = self._bulk_client_names(
+                    company['settore'], self._random.randint(2, 5)
+                )
             
             self.recurring_patterns[company_id] = patterns
     
+    def _fake_company_name(self) -> str:
+        """Next Faker company name, refilling the pool in bulk when it runs out"""
+        if not self._company_name_pool:
+            # Bound locale method: skips the Faker proxy lookup on every draw
+            company = self.fake['it_IT'].company
+            self._company_name_pool = [company() for _ in range(_FAKER_POOL_SIZE)]
+        return self._company_name_pool.pop()
+    
+    def _random_date(self, start: date, end: date) -> date:
+        """Uniform date in [start, end], drawn on day ordinals"""
+        return date.fromordinal(int(self._rng.integers(start.toordinal(), end.toordinal(), endpoint=True)))
+    
+    def _bulk_dates(self, start: date, end: date, n: int) -> List[date]:
+        """Draw n dates uniformly in [start, end], like Faker's date_between but in one call"""
+        offsets = self._rng.integers(0, (end - start).days, size=n, endpoint=True)
+        return (np.datetime64(start, 'D') + offsets.astype('timedelta64[D]')).tolist()
+    
     def _generate_client_name(self, sector: str) -> str:
         """Generate a client name appropriate for the sector"""
-        base_name = self.fake.company()
+        base_name = self._fake_company_name()
         
-        # Add sector-appropriate suffixes
-        if sector in ["Consulenza IT", "Ingegneria"]:
-            suffixes = ["Tech", "Systems", "Solutions", "Digital"]
-        elif sector in ["Servizi Legali", "Contabilità"]:
-            suffixes = ["& Partners", "Associati", "Studio"]
-        elif sector == "Marketing":
-            suffixes = ["Media", "Creative", "Brand", "Communications"]
-        else:
-            suffixes = ["Group", "SPA", "SRL"]
-        
-        if random.random() < 0.3:  # 30% chance to add suffix
-            base_name += " " + random.choice(suffixes)
+        if self._random.random() < 0.3:  # 30% chance to add a sector-appropriate suffix
+            base_name += " " + self._random.choice(_CLIENT_NAME_SUFFIXES.get(sector, _DEFAULT_CLIENT_NAME_SUFFIXES))
         
         return base_name
     
+    def _bulk_client_names(self, sector: str, n: int) -> List[str]:
+        """Generate n client names for a sector, drawing the suffixes in one go"""
+        suffixes = _CLIENT_NAME_SUFFIXES.get(sector, _DEFAULT_CLIENT_NAME_SUFFIXES)
+        # Same 30% suffix chance as _generate_client_name
+        add_suffix = (self._rng.random(n) < 0.3).tolist()
+        picks = self._rng.integers(0, len(suffixes), size=n).tolist()
+        return [
+            f"{self._fake_company_name()} {suffixes[pick]}" if add else self._fake_company_name()
+            for add, pick in zip(add_suffix, picks)
+        ]
+    
     def generate_companies(self, n: int) -> List[Dict]:
         """Generate realistic company data with enhanced sector distribution"""
         companies = []
         
-        # Ensure good distribution across sectors
-        sector_counts = {sector: 0 for sector in self.sectors}
+        # Ensure good distribution across sectors: sectors are dealt in rounds, the first one
+        # in list order and each later one in random order (one company per sector per round)
+        n_sectors = len(self.sectors)
+        rounds = np.tile(np.arange(n_sectors), (max(-(-n // n_sectors), 1), 1))
+        rounds[1:] = self._rng.permuted(rounds[1:], axis=1)
+        sector_picks = rounds.ravel()[:n].tolist()
+        # Random bytes of all company ids from a single urandom call
+        raw_ids = os.urandom(16 * n)
         
-        for i in range(n):
-            # Choose sector with some balancing
-            if i < len(self.sectors):
-                # First round: one company per sector
-                sector = self.sectors[i]
-            else:
-                # Subsequent rounds: weighted random selection
-                min_count = min(sector_counts.values())
-                available_sectors = [s for s, count in sector_counts.items() if count == min_count]
-                sector = random.choice(available_sectors)
-            
-            sector_counts[sector] += 1
-            
+        for i, pick in enumerate(sector_picks):
+            sector = self.sectors[pick]
             company = {
-                'id': str(uuid.uuid4()),
+                'id': str(uuid.UUID(bytes=raw_ids[16 * i:16 * (i + 1)], version=4)),
                 'nome': self._generate_company_name(sector),
                 'piva': self.fake.vat_id(),
                 'settore': sector,
@@ -171,179 +346,249 @@ class SyntheticDataGenerator:
     
     def _generate_company_name(self, sector: str) -> str:
         """Generate company name appropriate for the sector"""
-        base_name = self.fake.company()
+        base_name = self._fake_company_name()
         
         # Add sector-specific elements
         if sector == "Consulenza IT":
-            if random.random() < 0.4:
-                tech_words = ["Tech", "Digital", "Systems", "Solutions", "Software"]
+            if self._random.random() < 0.4:
                 base_name = base_name.replace("SRL", "").replace("SPA", "").strip()
-                base_name += " " + random.choice(tech_words)
+                base_name += " " + self._random.choice(_TECH_WORDS)
         elif sector == "Servizi Legali":
-            if random.random() < 0.3:
+            if self._random.random() < 0.3:
                 base_name = "Studio Legale " + base_name.replace("SRL", "").replace("SPA", "").strip()
         elif sector == "Marketing":
-            if random.random() < 0.3:
-                marketing_words = ["Creative", "Media", "Brand", "Communications"]
-                base_name += " " + random.choice(marketing_words)
+            if self._random.random() < 0.3:
+                base_name += " " + self._random.choice(_MARKETING_WORDS)
         
         return base_name
     
     def generate_invoice(self, company: Dict, scenario_type: str, amount_range: Optional[Tuple[float, float]] = None, use_recurrency: bool = False) -> Fattura:
         """Generate a single invoice for a company."""
-        company_id = company['id']
-        patterns = self.recurring_patterns.get(company_id, {})
-        
-        # Generate emission and due dates
-        data_emissione = self.fake.date_between(start_date='-1y', end_date='today')
-        data_scadenza = data_emissione + timedelta(days=random.randint(30, 90))
-        
-        # Generate amount
-        if amount_range:
-            importo = random.uniform(*amount_range)
-        else:
-            importo = random.uniform(100, 5000)  # Default amount range
-            if scenario_type == "installment":
-                importo = np.random.lognormal(mean=8.5, sigma=0.8)  # €3000-€15000
-            else:
-                importo = np.random.lognormal(mean=7.5, sigma=1.0)  # €500-€5000
+        return self._generate_invoices_batch([company], scenario_type, amount_range, use_recurrency)[0]
+    
+    def _generate_invoices_batch(self, companies: List[Dict], scenario_type: str,
+                                 amount_range: Optional[Tuple[float, float]] = None,
+                                 use_recurrency: bool = False, invoice_texts=None) -> List[Fattura]:
+        """Generate one invoice per company, requesting all AI texts in a single batch.
         
-        # Choose service type with recurrency consideration
-        if use_recurrency and patterns.get('provides_similar_services', False):
-            # Use preferred services for consistency
-            tipo_servizio = random.choice(patterns.get('preferred_services', 
-                                                      self.service_types[company['settore']]))
-        else:
-            tipo_servizio = random.choice(self.service_types[company['settore']])
+        invoice_texts replaces _invoice_texts as the source of the (descrizione, committente) pairs.
+        """
+        amounts = self._draw_invoice_amounts(len(companies), scenario_type, amount_range)
+        today = date.today()
+        emission_dates = self._bulk_dates(today - timedelta(days=365), today, len(companies))
+        # Uniform keys in [0, 1) picking each invoice's service from its candidate list
+        service_keys = self._rng.random(len(companies)).tolist()
+        due_dates = self._bulk_scadenze(emission_dates)
+        specs = []
+        for company, importo, data_emissione, data_scadenza, service_key in zip(
+                companies, amounts.tolist(), emission_dates, due_dates, service_keys):
+            patterns = self.recurring_patterns.get(company['id'], {})
+            
+            # Choose service type with recurrency consideration
+            services = self.service_types[company['settore']]
+            if use_recurrency and patterns.get('provides_similar_services', False):
+                # Use preferred services for consistency
+                services = patterns.get('preferred_services', services)
+            tipo_servizio = services[int(service_key * len(services))]
+            
+            # Generate committente with recurrency patterns; without them the AI committente
+            # is used, so no local name is drawn
+            committente = None
+            if use_recurrency and patterns.get('has_recurring_clients', False):
+                if self._random.random() < 0.6:
+                    # 60% chance to use recurring client
+                    committente = self._random.choice(patterns['recurring_clients'])
+                else:
+                    committente = self._generate_client_name(company['settore'])
+            
+            specs.append((company, patterns, data_emissione, data_scadenza, importo, tipo_servizio, committente))
         
-        # Generate committente with recurrency patterns
-        if use_recurrency and patterns.get('has_recurring_clients', False) and random.random() < 0.6:
-            # 60% chance to use recurring client
-            committente = random.choice(patterns.get('recurring_clients', [self._generate_client_name(company['settore'])]))
-        else:
-            committente = self._generate_client_name(company['settore'])
+        scadenze = self._ensure_valid_scadenze([spec[2] for spec in specs], [spec[3] for spec in specs])
+        # Numbered before the AI call, so that prompts can quote the invoice number
+        numeri = self._number_invoices([(spec[0]['id'], spec[2]) for spec in specs])
         
-        # Generate description and numero_fattura using AI
-        descrizione, ai_committente, numero_fattura = self.ai_generator.generate_invoice_data(
-            company['id'], data_emissione.strftime('%Y-%m-%d'), company['settore'], company['nome'], importo, tipo_servizio  # Fixed: use 'id' instead of 'cliente_id'
-        )
+        # Generate descriptions and committenti using AI, concurrently for the whole batch
+        ai_results = (invoice_texts or self._invoice_texts)([
+            {
+                'company_id': company['id'],
+                'data_emissione': data_emissione.strftime('%Y-%m-%d'),
+                'settore': company['settore'],
+                'prestatore': company['nome'],
+                'importo': importo,
+                'tipo_servizio': tipo_servizio,
+                'numero_fattura': numero_fattura
+            }
+            for (company, _, data_emissione, _, importo, tipo_servizio, _), numero_fattura in zip(specs, numeri)
+        ])
         
-        # Use AI-generated committente if recurrency doesn't apply
-        if not (use_recurrency and patterns.get('has_recurring_clients', False)):
-            committente = ai_committente
-        
-        fattura = Fattura(
-            id=uuid.uuid4(),  # Use a unique ID for each invoice
-            data_emissione=data_emissione,
-            data_scadenza=data_scadenza,
-            numero_fattura=numero_fattura,
-            descrizione=descrizione,
-            importo=importo,
-            prestatore=company['nome'],
-            committente=committente
-        )
+        fatture = []
+        for spec, data_scadenza, numero_fattura, (descrizione, ai_committente) in zip(specs, scadenze, numeri, ai_results):
+            company, patterns, data_emissione, _, importo, tipo_servizio, committente = spec
+            
+            # Use AI-generated committente if recurrency doesn't apply
+            if committente is None:
+                committente = ai_committente
+            
+            # Fields are generated locally and the dates were checked by _ensure_valid_scadenze,
+            # so the model is built without re-running validation
+            fattura = Fattura.model_construct(
+                data_emissione=_as_datetime(data_emissione),
+                data_scadenza=_as_datetime(data_scadenza),
+                numero_fattura=numero_fattura,
+                descrizione=descrizione,
+                importo=importo,
+                prestatore=company['nome'],
+                committente=committente
+            )
+            
+            # Track invoice history
+            self.company_invoice_history.append(
+                company['id'], fattura.id, committente, tipo_servizio, importo, data_emissione
+            )
+            fatture.append(fattura)
         
-        # Track invoice history
-        self.company_invoice_history[company_id].append({
-            'fattura_id': fattura.id,
-            'committente': committente,
-            'tipo_servizio': tipo_servizio,
-            'importo': importo,
-            'data_emissione': data_emissione
-        })
+        return fatture
+
+    def _invoice_texts(self, invoices: List[Dict]) -> List[Tuple[str, str]]:
+        """AI invoice texts for a batch, through the Batch API when use_batch_api is set"""
+        if self.settings.use_batch_api:
+            return self.ai_generator.generate_invoice_data_bulk(invoices, poll_interval=self.settings.batch_poll_interval)
+        return self.ai_generator.generate_invoice_data_batch(invoices)
+    
+    def _transaction_texts(self, transactions: List[Dict]) -> List[Tuple[str, str, str, bool]]:
+        """AI payment texts for a batch, through the Batch API when use_batch_api is set"""
+        if self.settings.use_batch_api:
+            return self.ai_generator.generate_transaction_data_bulk(transactions, poll_interval=self.settings.batch_poll_interval)
+        return self.ai_generator.generate_transaction_data_batch(transactions)
+    
+    def _next_invoice_number(self, company_id: str, data_emissione: date) -> str:
+        """Next invoice number of a company in the emission year, e.g. FT2024/0007"""
+        key = (company_id, data_emissione.year)
+        self._invoice_counters[key] += 1
+        return f"FT{data_emissione.year}/{self._invoice_counters[key]:04d}"
+    
+    def _number_invoices(self, issuers: List[Tuple[str, date]]) -> List[str]:
+        """Invoice numbers for a batch of (company_id, data_emissione), in input order.
         
-        return fattura
+        Numbers are handed out in emission-date order, so within a batch a company's
+        invoice N+1 is never dated before its invoice N.
+        """
+        numeri = [None] * len(issuers)
+        for i in sorted(range(len(issuers)), key=lambda i: issuers[i][1]):
+            numeri[i] = self._next_invoice_number(*issuers[i])
+        return numeri
 
+    def _draw_invoice_amounts(self, n: int, scenario_type: str,
+                              amount_range: Optional[Tuple[float, float]] = None) -> np.ndarray:
+        """Draw the amounts of n invoices in one go"""
+        if amount_range:
+            return self._rng.uniform(*amount_range, size=n)
+        if scenario_type == "installment":
+            return self._rng.lognormal(mean=8.5, sigma=0.8, size=n)  # €3000-€15000
+        return self._rng.lognormal(mean=7.5, sigma=1.0, size=n)  # €500-€5000
+    
     def generate_payment(self, fattura: Fattura, company: Dict, 
                         amount_pattern: AmountPattern = AmountPattern.EXACT,
                         timing_pattern: TimingPattern = TimingPattern.STANDARD,
                         quality_level: QualityLevel = QualityLevel.NOISY) -> Transazione:
         """Generate payment transaction for a given invoice"""
+        return self._generate_payments_batch([fattura], [company], amount_pattern, timing_pattern, quality_level)[0]
+    
+    def _generate_payments_batch(self, fatture: List[Fattura], companies: List[Dict],
+                                 amount_pattern: AmountPattern = AmountPattern.EXACT,
+                                 timing_pattern: TimingPattern = TimingPattern.STANDARD,
+                                 quality_level: QualityLevel = QualityLevel.NOISY,
+                                 include_invoice_numbers: Optional[np.ndarray] = None,
+                                 transaction_texts=None) -> List[Transazione]:
+        """Generate one payment per invoice, requesting all AI texts in a single batch.
         
-        # Calculate payment amount based on pattern
-        base_amount = fattura.importo
-        if amount_pattern == AmountPattern.EXACT:
-            importo = base_amount
-        elif amount_pattern == AmountPattern.PARTIAL:
-            importo = base_amount * random.uniform(0.3, 0.8)
-        elif amount_pattern == AmountPattern.EXCESS:
-            importo = base_amount * random.uniform(1.01, 1.1)
-        elif amount_pattern == AmountPattern.DISCOUNT:
-            importo = base_amount * random.uniform(0.9, 0.98)
-        elif amount_pattern == AmountPattern.PENALTY:
-            importo = base_amount * random.uniform(1.02, 1.05)
-        else:
-            importo = base_amount
-        
-        # Calculate payment date based on timing pattern
-        if timing_pattern == TimingPattern.STANDARD:
-            # 0-90 days after invoice date
-            days_offset = random.randint(0, 90)
-            data_pagamento = fattura.data_emissione + timedelta(days=days_offset)
-        elif timing_pattern == TimingPattern.DELAYED:
-            # >90 days after invoice date
-            days_offset = random.randint(91, 180)
-            data_pagamento = fattura.data_emissione + timedelta(days=days_offset)
-        elif timing_pattern == TimingPattern.EARLY:
-            # Before invoice date (advance payment)
-            days_offset = random.randint(-30, -1)
-            data_pagamento = fattura.data_emissione + timedelta(days=days_offset)
-        elif timing_pattern == TimingPattern.SAME_DAY:
-            # Same day as invoice
-            data_pagamento = fattura.data_emissione
+        include_invoice_numbers can be passed in already drawn; transaction_texts replaces
+        _transaction_texts as the source of the payment texts.
+        """
+        if include_invoice_numbers is None:
+            include_invoice_numbers = self._draw_include_invoice_numbers(len(fatture), quality_level)
+        
+        # Calculate payment amounts based on pattern, all in one draw
+        base_amounts = np.fromiter((f.importo for f in fatture), dtype=float, count=len(fatture))
+        multiplier_range = _AMOUNT_MULTIPLIER_RANGES.get(amount_pattern)
+        if multiplier_range is None:
+            amounts = base_amounts
         else:
-            # Default to standard
-            days_offset = random.randint(0, 90)
-            data_pagamento = fattura.data_emissione + timedelta(days=days_offset)
-        
-        # Determine invoice number inclusion probability based on quality level
-        if quality_level == QualityLevel.PERFECT:
-            invoice_number_probability = 0.5
-        elif quality_level == QualityLevel.FUZZY:
-            invoice_number_probability = 0.25
-        else:  # NOISY
-            invoice_number_probability = 0.1
-        
-        # Generate transaction details using AI
-        dettaglio, causale, controparte, has_invoice_ref = self.ai_generator.generate_transaction_data(
-            fattura, importo, invoice_number_probability
-        )
+            amounts = base_amounts * self._rng.uniform(*multiplier_range, size=len(fatture))
         
-        transazione = Transazione(
-            id=str(uuid.uuid4()),
-            data=data_pagamento,
-            dettaglio=dettaglio,
-            importo=importo,
-            tipologia_movimento="pagamento",
-            controparte=controparte,
-            causale=causale,
-            invoice_number=1 if has_invoice_ref else 0
-        )
+        # Calculate payment dates based on timing pattern, as day offsets from the emission date
+        low, high = _TIMING_OFFSET_RANGES.get(timing_pattern, _TIMING_OFFSET_RANGES[TimingPattern.STANDARD])
+        offsets = self._rng.integers(low, high, size=len(fatture), endpoint=True)
+        emissioni = np.array([f.data_emissione for f in fatture], dtype='datetime64[us]')
+        dates = (emissioni + offsets.astype('timedelta64[D]')).tolist()
+        
+        requests = [
+            {'fattura': fattura, 'importo': importo, 'include_invoice_number': bool(include_invoice_number)}
+            for fattura, importo, include_invoice_number in zip(fatture, amounts.tolist(), include_invoice_numbers)
+        ]
         
-        return transazione
+        # Generate transaction details using AI, concurrently for the whole batch
+        ai_results = (transaction_texts or self._transaction_texts)(requests)
+        
+        transazioni = []
+        for request, data_pagamento, (dettaglio, causale, controparte, has_invoice_ref) in zip(requests, dates, ai_results):
+            transazione = Transazione.model_construct(
+                data=data_pagamento,
+                dettaglio=dettaglio,
+                importo=request['importo'],
+                tipologia_movimento="pagamento",
+                controparte=controparte,
+                causale=causale,
+                invoice_number=bool(has_invoice_ref)
+            )
+            transazioni.append(transazione)
+        
+        return transazioni
+    
+    def _draw_include_invoice_numbers(self, n: int, quality_level: QualityLevel) -> np.ndarray:
+        """Which of n payments mention their invoice number, by the quality level's probability"""
+        invoice_number_probability = _INVOICE_NUMBER_PROBABILITY.get(quality_level, _INVOICE_NUMBER_PROBABILITY[QualityLevel.NOISY])
+        return self._rng.random(n) < invoice_number_probability
     
     def generate_scenario_1_1_perfect(self, n_pairs: int) -> Tuple[List[Fattura], List[Transazione], List[GroundTruth]]:
         """Generate 1:1 perfect match scenario"""
-        fatture = []
-        transazioni = []
         ground_truth = []
     
         companies_to_use = self._select_companies_for_scenario(n_pairs)
+        include_invoice_numbers = self._draw_include_invoice_numbers(len(companies_to_use), QualityLevel.NOISY)
+        invoice_texts = transaction_texts = None
+        if self.settings.pair_prompts and not self.settings.use_batch_api:
+            # Each invoice and its payment are written by the same LLM call: the payment texts
+            # are kept aside while the invoices are built, then handed to the payments batch
+            pair_payment_texts = []
+            
+            def invoice_texts(invoices):
+                pairs = self.ai_generator.generate_pair_data_batch([
+                    {**inv, 'include_invoice_number': bool(include)}
+                    for inv, include in zip(invoices, include_invoice_numbers)
+                ])
+                pair_payment_texts.extend(payment for _, payment in pairs)
+                return [invoice for invoice, _ in pairs]
+            
+            def transaction_texts(requests):
+                return pair_payment_texts
     
-        for company in companies_to_use:
-            # Generate invoice with one-shot pricing distribution
-            fattura = self.generate_invoice(company, scenario_type="oneshot", use_recurrency=True)
-            fatture.append(fattura)
+        # Generate invoices with one-shot pricing distribution
+        fatture = self._generate_invoices_batch(
+            companies_to_use, scenario_type="oneshot", use_recurrency=True, invoice_texts=invoice_texts
+        )
     
-            # Generate matching payment
-            transazione = self.generate_payment(
-                fattura, company,
-                AmountPattern.EXACT,
-                TimingPattern.STANDARD,
-                QualityLevel.NOISY
-            )
-            transazioni.append(transazione)
+        # Generate matching payments
+        transazioni = self._generate_payments_batch(
+            fatture, companies_to_use,
+            AmountPattern.EXACT,
+            TimingPattern.STANDARD,
+            QualityLevel.NOISY,
+            include_invoice_numbers=include_invoice_numbers,
+            transaction_texts=transaction_texts
+        )
     
+        for fattura, transazione in zip(fatture, transazioni):
             # Create ground truth
             gt = GroundTruth(
                 fattura_id=str(fattura.id),
@@ -359,90 +604,104 @@ class SyntheticDataGenerator:
     
     def _select_companies_for_scenario(self, n_items: int) -> List[Dict]:
         """Select companies for a scenario, ensuring good distribution and reuse"""
-        if n_items <= len(self.companies):
-            return random.sample(self.companies, n_items)
+        n_companies = len(self.companies)
+        if n_items <= n_companies:
+            idx = self._rng.choice(n_companies, n_items, replace=False)
         else:
-            # Need to reuse companies
-            selected = []
-            companies_pool = self.companies.copy()
-            
-            while len(selected) < n_items:
-                if not companies_pool:
-                    companies_pool = self.companies.copy()
-                
-                company = random.choice(companies_pool)
-                selected.append(company)
-                companies_pool.remove(company)
-            
-            return selected
+            # Need to reuse companies: every company is used once per round, in a fresh order each round
+            rounds = -(-n_items // n_companies)
+            idx = self._rng.permuted(np.tile(np.arange(n_companies), (rounds, 1)), axis=1).ravel()[:n_items]
+        companies = self.companies
+        return [companies[i] for i in idx.tolist()]
     
-    def _generate_scadenza_date(self, data_emissione: datetime) -> datetime:
-        """Generate a due date 30-90 days after the emission date."""
-        return data_emissione + timedelta(days=random.randint(30, 90))
+    def _bulk_scadenze(self, emissioni: List[date]) -> List[date]:
+        """Due dates 30-90 days after each emission date, drawn in one call"""
+        offsets = self._rng.integers(30, 90, size=len(emissioni), endpoint=True)
+        return (np.array(emissioni, dtype='datetime64[D]') + offsets.astype('timedelta64[D]')).tolist()
+
+    def _ensure_valid_scadenze(self, emissioni: List, scadenze: List) -> List:
+        """Regenerate the due dates rejected by Fattura.validate_batch before building the models."""
+        bad_rows = Fattura.validate_batch(
+            np.array(emissioni, dtype='datetime64[D]'), np.array(scadenze, dtype='datetime64[D]')
+        )
+        bad_rows = bad_rows.tolist()
+        for i, data_scadenza in zip(bad_rows, self._bulk_scadenze([emissioni[i] for i in bad_rows])):
+            scadenze[i] = data_scadenza
+        return scadenze
 
-    def _generate_group_invoice_amount(self) -> float:
-        """Generate invoice amount for group payment scenario (€200-€2000)"""
-        return random.uniform(200, 2000)
+    def _generate_group_invoice_amounts(self, n: int) -> np.ndarray:
+        """Generate invoice amounts for group payment scenario (€200-€2000)"""
+        return self._rng.uniform(200, 2000, size=n)
     
     def _generate_billing_period_invoices(self, company: Dict, n_invoices: int, 
                                          billing_period: str = "monthly") -> List[Fattura]:
         """Generate multiple invoices within the same billing period"""
-        fatture = []
-        
+        specs = self._plan_billing_period_invoices(company, n_invoices, billing_period)
+        return self._build_billing_period_invoices([(company, spec) for spec in specs])
+    
+    def _plan_billing_period_invoices(self, company: Dict, n_invoices: int,
+                                      billing_period: str = "monthly") -> List[Tuple]:
+        """Draw dates, amounts and service types of an invoice group, without the AI texts"""
         # Define a random reference "today" within the last month so that
         # generated billing periods are not always anchored to the real current
         # date. This keeps the dataset temporally consistent but still varied
         # over time.
         real_today = datetime.today().date()
-        today_range_start = real_today - relativedelta(months=1)
-        reference_today = self.fake.date_between_dates(today_range_start, real_today)
+        today_range_start = _shift_months(real_today, -1)
+        reference_today = self._random_date(today_range_start, real_today)
 
         if billing_period == "monthly":
-            start_range_start = reference_today - relativedelta(months=6)
-            start_range_end = reference_today - relativedelta(months=1)
-            period_start = self.fake.date_between_dates(start_range_start, start_range_end)
+            start_range_start = _shift_months(reference_today, -6)
+            start_range_end = _shift_months(reference_today, -1)
+            period_start = self._random_date(start_range_start, start_range_end)
             # Last day of the invoice month
-            period_end = (period_start.replace(day=1) + relativedelta(months=1)) - timedelta(days=1)
+            period_end = period_start.replace(day=calendar.monthrange(period_start.year, period_start.month)[1])
         elif billing_period == "quarterly":
-            start_range_start = reference_today - relativedelta(months=9)
-            start_range_end = reference_today - relativedelta(months=3)
-            period_start = self.fake.date_between_dates(start_range_start, start_range_end)
-            period_end = period_start + relativedelta(months=3) - timedelta(days=1)
+            start_range_start = _shift_months(reference_today, -9)
+            start_range_end = _shift_months(reference_today, -3)
+            period_start = self._random_date(start_range_start, start_range_end)
+            period_end = _shift_months(period_start, 3) - timedelta(days=1)
         else:  # weekly
-            start_range_start = reference_today - relativedelta(months=3)
-            start_range_end = reference_today - relativedelta(weeks=2)
-            period_start = self.fake.date_between_dates(start_range_start, start_range_end)
+            start_range_start = _shift_months(reference_today, -3)
+            start_range_end = reference_today - timedelta(weeks=2)
+            period_start = self._random_date(start_range_start, start_range_end)
             period_end = period_start + timedelta(days=7) - timedelta(days=1)
         
         # Generate project/service linking patterns
-        link_type = random.choice(["project_code", "monthly_service", "recurring_delivery", "none"])
+        link_type = self._random.choice(["project_code", "monthly_service", "recurring_delivery", "none"])
         
         if link_type == "project_code":
-            project_code = f"PROJ-{random.randint(1000, 9999)}"
+            project_code = f"PROJ-{self._random.randint(1000, 9999)}"
             base_description = f"Servizi progetto {project_code}"
         elif link_type == "monthly_service":
-            service_name = random.choice(["Consulenza", "Manutenzione", "Assistenza", "Formazione"])
+            service_name = self._random.choice(["Consulenza", "Manutenzione", "Assistenza", "Formazione"])
             base_description = f"{service_name} mensile"
         elif link_type == "recurring_delivery":
-            delivery_type = random.choice(["Consegna", "Fornitura", "Spedizione"])
+            delivery_type = self._random.choice(["Consegna", "Fornitura", "Spedizione"])
             base_description = f"{delivery_type} periodica"
         else:
             base_description = None
         
-        for i in range(n_invoices):
-            # Generate invoice date within billing period
-            data_emissione = self.fake.date_between(start_date=period_start, end_date=period_end)
-            data_scadenza = self._generate_scadenza_date(data_emissione)
-            
-            # Generate amount for group payment scenario
-            importo = self._generate_group_invoice_amount()
+        # Generate amounts for group payment scenario
+        amounts = self._generate_group_invoice_amounts(n_invoices).tolist()
+        # Invoice dates within the billing period
+        emission_dates = self._bulk_dates(period_start, period_end, n_invoices)
+        due_dates = self._bulk_scadenze(emission_dates)
+        
+        if base_description is None:
+            # Unlinked invoices pick their service among the sector's, drawn all at once
+            services = self.service_types[company['settore']]
+            service_picks = self._rng.integers(0, len(services), size=n_invoices).tolist()
+        
+        specs = []
+        for i, (importo, data_emissione, data_scadenza) in enumerate(zip(amounts, emission_dates, due_dates)):
             
             # Generate linked descriptions if applicable
             if base_description:
                 if link_type == "project_code":
                     descrizione_suffix = f" - Fase {i+1}"
                 elif link_type == "monthly_service":
-                    descrizione_suffix = f" - Periodo {data_emissione.strftime('%m/%Y')}"
+                    descrizione_suffix = f" - Periodo {self._period_ref(data_emissione)}"
                 elif link_type == "recurring_delivery":
                     descrizione_suffix = f" - N. {i+1}/{n_invoices}"
                 else:
@@ -450,30 +709,41 @@ class SyntheticDataGenerator:
                 
                 # Use AI to generate realistic description incorporating the link
                 tipo_servizio = f"{base_description}{descrizione_suffix}"
-                descrizione, committente, numero_fattura = self.ai_generator.generate_invoice_data(
-                    company_id=company['id'],
-                    data_emissione=data_emissione.strftime('%Y-%m-%d'),
-                    settore=company['settore'],
-                    prestatore=company['nome'],
-                    importo=importo,
-                    tipo_servizio=tipo_servizio
-                )
             else:
                 # Generate normal invoice
-                tipo_servizio = random.choice(self.service_types[company['settore']])
-                descrizione, committente, numero_fattura = self.ai_generator.generate_invoice_data(
-                    company_id=company['id'], 
-                    data_emissione=data_emissione.strftime('%Y-%m-%d'), 
-                    settore=company['settore'], 
-                    prestatore=company['nome'], 
-                    importo=importo, 
-                    tipo_servizio=tipo_servizio
-                )
-
-            fattura = Fattura(
-                id=uuid.uuid4(),  # Use unique ID for each invoice
-                data_emissione=data_emissione,
-                data_scadenza=data_scadenza,
+                tipo_servizio = services[service_picks[i]]
+            
+            specs.append((data_emissione, data_scadenza, importo, tipo_servizio))
+        
+        scadenze = self._ensure_valid_scadenze([spec[0] for spec in specs], [spec[1] for spec in specs])
+        return [
+            (data_emissione, data_scadenza, importo, tipo_servizio)
+            for (data_emissione, _, importo, tipo_servizio), data_scadenza in zip(specs, scadenze)
+        ]
+    
+    def _build_billing_period_invoices(self, planned: List[Tuple[Dict, Tuple]]) -> List[Fattura]:
+        """Build planned (company, spec) invoices, requesting all their AI texts in one batch"""
+        ai_results = self._invoice_texts([
+            {
+                'company_id': company['id'],
+                'data_emissione': data_emissione.strftime('%Y-%m-%d'),
+                'settore': company['settore'],
+                'prestatore': company['nome'],
+                'importo': importo,
+                'tipo_servizio': tipo_servizio
+            }
+            for company, (data_emissione, _, importo, tipo_servizio) in planned
+        ])
+        
+        numeri = self._number_invoices([(company['id'], spec[0]) for company, spec in planned])
+        fatture = []
+        for (company, (data_emissione, data_scadenza, importo, _)), (descrizione, committente), numero_fattura in zip(
+                planned, ai_results, numeri):
+            # Fields are generated locally and the dates were checked by _ensure_valid_scadenze,
+            # so the model is built without re-running validation
+            fattura = Fattura.model_construct(
+                data_emissione=_as_datetime(data_emissione),
+                data_scadenza=_as_datetime(data_scadenza),
                 numero_fattura=numero_fattura,
                 descrizione=descrizione,
                 importo=importo,
@@ -484,287 +754,327 @@ class SyntheticDataGenerator:
         
         return fatture
     
-    def _generate_group_payment_date(self, fatture: List[Fattura]) -> datetime:
-        """Generate payment date near or slightly after the latest due date"""
-        latest_due_date = max(fattura.data_scadenza for fattura in fatture)
-        
-        # Payment occurs 0-15 days after the latest due date
-        days_after = random.randint(0, 15)
-        return latest_due_date + timedelta(days=days_after)
+    def _period_ref(self, value: date) -> str:
+        """MM/YYYY reference of a date's month, formatted once per month"""
+        key = (value.year, value.month)
+        ref = self._period_refs.get(key)
+        if ref is None:
+            ref = self._period_refs[key] = f"{value.month:02d}/{value.year}"
+        return ref
     
     def _generate_group_payment_reference(self, fatture: List[Fattura], 
                                         include_all_ids: bool = True) -> Tuple[str, str]:
         """Generate payment details and causale with invoice references"""
         if include_all_ids and len(fatture) <= 3:
             # Include all invoice numbers for small groups
-            invoice_numbers = [f.numero_fattura for f in fatture]
-            invoice_ref = ", ".join(invoice_numbers)
-            
-            dettaglio = f"BONIFICO SEPA - Pagamento fatture n. {invoice_ref}"
-            causale = f"Pagamento fatture {invoice_ref}"
-        elif len(fatture) > 3:
+            invoice_ref = ", ".join([f.numero_fattura for f in fatture])
+            return _GROUP_DETTAGLIO_NUMBERS + invoice_ref, _GROUP_CAUSALE + invoice_ref
+        if len(fatture) > 3:
             # For larger groups, use period reference
             first_date = min(f.data_emissione for f in fatture)
             last_date = max(f.data_emissione for f in fatture)
-            
-            if first_date.month == last_date.month:
-                period_ref = first_date.strftime("%m/%Y")
-                dettaglio = f"BONIFICO SEPA - Pagamento fatture periodo {period_ref}"
-                causale = f"Pagamento fatture {period_ref}"
-            else:
-                period_ref = f"{first_date.strftime('%m/%Y')}-{last_date.strftime('%m/%Y')}"
-                dettaglio = f"BONIFICO SEPA - Pagamento fatture periodo {period_ref}"
-                causale = f"Pagamento fatture {period_ref}"
-        else:
-            # Generic group payment reference
-            dettaglio = f"BONIFICO SEPA - Pagamento fatture multiple"
-            causale = f"Pagamento fatture multiple"
-        
-        return dettaglio, causale
+            period_ref = self._period_ref(first_date)
+            if first_date.month != last_date.month:
+                period_ref += "-" + self._period_ref(last_date)
+            return _GROUP_DETTAGLIO_PERIOD + period_ref, _GROUP_CAUSALE + period_ref
+        # Generic group payment reference
+        return _GROUP_DETTAGLIO_MULTIPLE, _GROUP_CAUSALE_MULTIPLE
     
     def generate_scenario_n_1_group_payment(self, n_groups: int) -> Tuple[List[Fattura], List[Transazione], List[GroundTruth]]:
         """Generate N:1 group payment scenario"""
         fatture = []
         transazioni = []
-        ground_truth = []
     
         # FIX: Use existing companies instead of generating new ones
         companies_to_use = self._select_companies_for_scenario(n_groups)
     
-        for company in companies_to_use:
-            # Generate a group of invoices for the same company
-            n_invoices = np.random.choice([2, 3, 4, 5], p=[0.4, 0.3, 0.2, 0.1])
-            
-            # Choose billing period type
-            billing_period = random.choice(["monthly", "quarterly", "weekly"])
+        # Group sizes, billing period types and total variations of all groups in one draw each
+        group_sizes = self._rng.choice([2, 3, 4, 5], size=len(companies_to_use), p=[0.4, 0.3, 0.2, 0.1]).tolist()
+        period_picks = self._rng.integers(0, len(_BILLING_PERIODS), size=len(companies_to_use)).tolist()
+        # Small variation on the total (±2% for rounding, fees, etc.)
+        variations = self._rng.uniform(0.98, 1.02, size=len(companies_to_use))
+        
+        groups = []
+        planned = []
+        for company, n_invoices, period_pick in zip(companies_to_use, group_sizes, period_picks):
+            billing_period = _BILLING_PERIODS[period_pick]
             
-            # Generate group of invoices within same billing period
-            group_fatture = self._generate_billing_period_invoices(
-                company, n_invoices, billing_period
-            )
+            # Plan the group of invoices within same billing period
+            specs = self._plan_billing_period_invoices(company, n_invoices, billing_period)
+            groups.append((company, n_invoices, billing_period))
+            planned.extend((company, spec) for spec in specs)
+        
+        # The AI texts of every group are requested in a single batch
+        built = self._build_billing_period_invoices(planned)
+        counts = np.array([n_invoices for _, n_invoices, _ in groups], dtype=int)
+        starts = np.cumsum(counts) - counts
+        
+        # Payments occur 0-15 days after the latest due date of their group
+        due_dates = np.array([f.data_scadenza for f in built], dtype='datetime64[us]')
+        days_after = self._rng.integers(0, 15, size=len(groups), endpoint=True)
+        payment_dates = (np.maximum.reduceat(due_dates, starts) + days_after.astype('timedelta64[D]')).tolist()
+        
+        # Group totals and payment amounts; each invoice is covered in proportion to its amount
+        amounts = np.fromiter((f.importo for f in built), dtype=float, count=len(built))
+        totals = np.add.reduceat(amounts, starts)
+        payment_amounts = totals * variations
+        amounts_covered = (amounts * np.repeat(payment_amounts / totals, counts)).tolist()
+        
+        for (company, n_invoices, billing_period), start, payment_date, payment_amount in zip(
+                groups, starts.tolist(), payment_dates, payment_amounts.tolist()):
+            group_fatture = built[start:start + n_invoices]
             fatture.extend(group_fatture)
             
-            # Calculate total amount for group payment
-            total_amount = sum(f.importo for f in group_fatture)
-            
-            # Add small variation to total (±2% for rounding, fees, etc.)
-            payment_amount = total_amount * random.uniform(0.98, 1.02)
-            
-            # Generate payment date based on latest due date
-            payment_date = self._generate_group_payment_date(group_fatture)
-            
             # Generate payment reference including invoice information
             dettaglio, causale = self._generate_group_payment_reference(group_fatture)
             
             # Create group payment transaction
-            transazione = Transazione(
+            transazione = Transazione.model_construct(
                 data=payment_date,
                 dettaglio=dettaglio,
                 importo=payment_amount,
                 tipologia_movimento="pagamento",
                 controparte=company['nome'],
                 causale=causale,
-                invoice_number=1  # Indicates reference to invoice numbers
+                invoice_number=True  # Indicates reference to invoice numbers
             )
             transazioni.append(transazione)
-            
-            # Create ground truth entries for each invoice in the group
-            for i, fattura in enumerate(group_fatture):
-                # Calculate proportional amount covered
-                amount_covered = (fattura.importo / total_amount) * payment_amount
-                
-                gt = GroundTruth(
-                    fattura_id=str(fattura.id),
-                    pagamento_id=str(transazione.id),
-                    match_type=MatchType.PARTIAL.value,
-                    confidence=0.85,  # Slightly lower confidence for group payments
-                    amount_covered=amount_covered,
-                    notes=f"Group payment {i+1}/{n_invoices} - {billing_period} billing"
-                )
-                ground_truth.append(gt)
+        
+        # Ground truth entries of all groups, each invoice pointing at its group's payment
+        group_index = np.repeat(np.arange(len(groups)), counts).tolist()
+        positions = (np.arange(len(fatture)) - np.repeat(starts, counts) + 1).tolist()
+        ground_truth = [
+            GroundTruth(
+                fattura_id=str(fattura.id),
+                pagamento_id=str(transazioni[g].id),
+                match_type=MatchType.PARTIAL.value,
+                confidence=0.85,  # Slightly lower confidence for group payments
+                amount_covered=amount_covered,
+                notes=f"Group payment {position}/{groups[g][1]} - {groups[g][2]} billing"
+            )
+            for fattura, g, amount_covered, position in zip(fatture, group_index, amounts_covered, positions)
+        ]
         
         return fatture, transazioni, ground_truth
     
     def generate_scenario_1_n_installments(self, n_invoices: int) -> Tuple[List[Fattura], List[Transazione], List[GroundTruth]]:
         """Generate 1:N installment scenario"""
-        fatture = []
         transazioni = []
         ground_truth = []
     
         companies_to_use = self._select_companies_for_scenario(n_invoices)
     
-        for i, company in enumerate(companies_to_use):
-            fattura = self.generate_invoice(
-                company,
-                amount_range=(2000, 15000),  # Higher amounts for installment payments
-                scenario_type="installment",
-                use_recurrency=True
-            )
-            fatture.append(fattura)
+        fatture = self._generate_invoices_batch(
+            companies_to_use,
+            amount_range=(2000, 15000),  # Higher amounts for installment payments
+            scenario_type="installment",
+            use_recurrency=True
+        )
     
-            # Split the invoice into 2-4 installments
-            n_installments = random.choice([2, 3, 4])
-            installment_amount = round(fattura.importo / n_installments, 2)
-            for j in range(n_installments):
-                transazione = self.generate_payment(
-                    fattura, company,
-                    AmountPattern.EXACT,
-                    TimingPattern.STANDARD,
-                    QualityLevel.NOISY
-                )
-                # Manually set the amount and date for each installment
-                transazione.importo = installment_amount
-                transazione.data = fattura.data_emissione + timedelta(days=30 * (j + 1))
-                transazioni.append(transazione)
-                ground_truth.append(GroundTruth(
-                    fattura_id=str(fattura.id),
-                    pagamento_id=str(transazione.id),
-                    match_type=MatchType.EXACT.value,  # Use a valid MatchType
-                    confidence=1.0,  # Set confidence as appropriate
-                    amount_covered=transazione.importo,  # Or the correct logic for your scenario
-                    notes=f"Installment {j+1}/{n_installments} for invoice {fattura.id}"
-                ))
+        # Split each invoice into 2-4 installments
+        counts = self._rng.choice([2, 3, 4], size=len(fatture))
+        installment_counts = counts.tolist()
+        installment_fatture = []
+        installment_companies = []
+        for fattura, company, n_installments in zip(fatture, companies_to_use, installment_counts):
+            installment_fatture.extend([fattura] * n_installments)
+            installment_companies.extend([company] * n_installments)
+    
+        payments = self._generate_payments_batch(
+            installment_fatture, installment_companies,
+            AmountPattern.EXACT,
+            TimingPattern.STANDARD,
+            QualityLevel.NOISY
+        )
+        
+        # Amount and date of every installment in one pass: equal shares of the
+        # invoice, due every 30 days from the emission date
+        importi = np.fromiter((f.importo for f in fatture), dtype=float, count=len(fatture))
+        installment_amounts = np.repeat(np.round(importi / counts, 2), counts).tolist()
+        starts = np.cumsum(counts) - counts
+        installment_numbers = np.arange(counts.sum()) - np.repeat(starts, counts) + 1
+        emissioni = np.array([f.data_emissione for f in fatture], dtype='datetime64[us]')
+        installment_dates = (
+            np.repeat(emissioni, counts) + (30 * installment_numbers).astype('timedelta64[D]')
+        ).tolist()
+        
+        for transazione, fattura, n_installments, j, importo, data in zip(
+                payments, installment_fatture, np.repeat(counts, counts).tolist(),
+                installment_numbers.tolist(), installment_amounts, installment_dates):
+            # Manually set the amount and date for each installment
+            transazione.importo = importo
+            transazione.data = data
+            transazioni.append(transazione)
+            ground_truth.append(GroundTruth(
+                fattura_id=str(fattura.id),
+                pagamento_id=str(transazione.id),
+                match_type=MatchType.EXACT.value,  # Use a valid MatchType
+                confidence=1.0,  # Set confidence as appropriate
+                amount_covered=transazione.importo,  # Or the correct logic for your scenario
+                notes=f"Installment {j}/{n_installments} for invoice {fattura.id}"
+            ))
         return fatture, transazioni, ground_truth
 
     def generate_scenario_standalone_invoices(self, n_invoices: int) -> Tuple[List[Fattura], List[Transazione], List[GroundTruth]]:
         """Generate a number of standalone invoices (without payments)."""
-        fatture = []
         transazioni = []  # No transactions for standalone invoices
         ground_truth = [] # No ground truth for standalone invoices
     
         companies_to_use = self._select_companies_for_scenario(n_invoices)
     
-        for company in companies_to_use:
-            fattura = self.generate_invoice(
-                company,
-                scenario_type="standalone_invoice",
-                use_recurrency=False # Standalone invoices might not follow recurring patterns
-            )
-            fatture.append(fattura)
+        fatture = self._generate_invoices_batch(
+            companies_to_use,
+            scenario_type="standalone_invoice",
+            use_recurrency=False # Standalone invoices might not follow recurring patterns
+        )
     
         return fatture, transazioni, ground_truth
 
     def generate_scenario_standalone_payments(self, n_payments: int) -> Tuple[List[Fattura], List[Transazione], List[GroundTruth]]:
         """Generate a number of standalone payments (without invoices)."""
         fatture = []  # No invoices for standalone payments
-        transazioni = []
         ground_truth = [] # No ground truth for standalone payments
     
         companies_to_use = self._select_companies_for_scenario(n_payments)
     
-        for company in companies_to_use:
+        dummy_amounts = self._rng.uniform(50, 5000, size=len(companies_to_use)).tolist()
+        today = date.today()
+        dummy_dates = self._bulk_dates(today - timedelta(days=365), today, len(companies_to_use))
+        dummy_due_dates = self._bulk_scadenze(dummy_dates)
+        dummy_fatture = []
+        for company, dummy_importo, data_emissione, data_scadenza in zip(
+                companies_to_use, dummy_amounts, dummy_dates, dummy_due_dates):
             # Generate a dummy invoice to use generate_payment, as it requires a Fattura object.
             # The generated payment will not be linked to this dummy invoice in the output.
-            data_emissione = self.fake.date_between(start_date='-1y', end_date='today')
-            data_scadenza = data_emissione + timedelta(days=random.randint(30, 90))
-
-            dummy_fattura = Fattura(
-                id=uuid.uuid4(),
-                data_emissione=data_emissione,
-                data_scadenza=data_scadenza,
+            dummy_fattura = Fattura.model_construct(
+                data_emissione=_as_datetime(data_emissione),
+                data_scadenza=_as_datetime(data_scadenza),
                 numero_fattura="DUMMY",
                 descrizione="Dummy invoice for standalone payment generation",
-                importo=random.uniform(50, 5000),
+                importo=dummy_importo,
                 prestatore=company['nome'],
-                committente=self.fake.company()
+                committente=self._fake_company_name()
             )
-            
-            transazione = self.generate_payment(
-                dummy_fattura, # Pass dummy invoice, but it won't be part of the final dataset
-                company,
-                AmountPattern.EXACT, # Or choose another pattern as appropriate
-                TimingPattern.STANDARD, # Or choose another pattern as appropriate
-                QualityLevel.NOISY # Standalone payments are often noisy/unmatched
-            )
-            transazioni.append(transazione)
+            dummy_fatture.append(dummy_fattura)
+    
+        transazioni = self._generate_payments_batch(
+            dummy_fatture, # Pass dummy invoices, but they won't be part of the final dataset
+            companies_to_use,
+            AmountPattern.EXACT, # Or choose another pattern as appropriate
+            TimingPattern.STANDARD, # Or choose another pattern as appropriate
+            QualityLevel.NOISY # Standalone payments are often noisy/unmatched
+        )
     
         return fatture, transazioni, ground_truth
 
+    @contextmanager
+    def _scenario_rng(self, name: str):
+        """Route every random draw made inside the block to the streams of one scenario"""
+        state = self._scenario_streams[name]
+        saved = (self._rng, self._random, self._company_name_pool, self.fake.random)
+        self._rng = state['rng']
+        self._random = state['random']
+        self._company_name_pool = state['name_pool']
+        self.fake.random = state['faker_random']
+        try:
+            with self.ai_generator.use_random(state['ai_random']):
+                yield
+        finally:
+            # A refill replaces the pool list, so keep the current one for the next batch
+            state['name_pool'] = self._company_name_pool
+            self._rng, self._random, self._company_name_pool, self.fake.random = saved
+
+    def _run_scenario(self, generate, n_items: int, collect):
+        """Run a scenario generator in chunks of at most batch_size items, passing each chunk to collect."""
+        step = self.settings.batch_size or n_items
+        for start in range(0, n_items, step):
+            collect(*generate(min(step, n_items - start)))
+
     def generate_dataset(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, Dict]:
         """Generate complete synthetic dataset"""
-        all_fatture = []
-        all_transazioni = []
-        all_ground_truth = []
+        parts = []  # (fatture, transazioni, ground_truth) of every generated batch
+        totals = {'fatture': 0, 'transazioni': 0, 'ground_truth': 0}
+        shards = ParquetShardWriter(self.settings.shard_dir) if self.settings.shard_dir else None
+        
+        def collect(fatture, transazioni, gt):
+            totals['fatture'] += len(fatture)
+            totals['transazioni'] += len(transazioni)
+            totals['ground_truth'] += len(gt)
+            if shards is None:
+                parts.append((fatture, transazioni, gt))
+                return
+            # Spill the batch to disk and release the model objects right away; the columns are
+            # read straight off the records, without a model_dump/asdict dict per row
+            shards.write_frame('invoices', _records_to_frame(fatture, _FATTURA_COLUMNS, _FATTURA_DTYPES))
+            shards.write_frame('payments', _records_to_frame(transazioni, _TRANSAZIONE_COLUMNS, _TRANSAZIONE_DTYPES))
+            shards.write_frame('ground_truth', _records_to_frame(gt, _GROUND_TRUTH_COLUMNS, _GROUND_TRUTH_DTYPES))
+            del fatture, transazioni, gt
+            gc.collect()
         
         # Generate different scenarios based on config
-        scenarios_config = self.config.get('scenarios', {})
+        scenarios = self.settings.scenarios
         
-        # 1:1 Perfect Match
-        if scenarios_config.get('perfect_1_1', 0) > 0:
-            fatture, transazioni, gt = self.generate_scenario_1_1_perfect(
-                scenarios_config['perfect_1_1']
-            )
-            all_fatture.extend(fatture)
-            all_transazioni.extend(transazioni)
-            all_ground_truth.extend(gt)
-        
-        # 1:N Installments
-        if scenarios_config.get('installments_1_n', 0) > 0:
-            fatture, transazioni, gt = self.generate_scenario_1_n_installments(
-                scenarios_config['installments_1_n']
-            )
-            all_fatture.extend(fatture)
-            all_transazioni.extend(transazioni)
-            all_ground_truth.extend(gt)
-
-        # N:1 Group Payment
-        if scenarios_config.get('group_payment_n_1', 0) > 0:
-            fatture, transazioni, gt = self.generate_scenario_n_1_group_payment(
-                scenarios_config['group_payment_n_1']
-            )
-            all_fatture.extend(fatture)
-            all_transazioni.extend(transazioni)
-            all_ground_truth.extend(gt)
-
-        # Standalone Invoices
-        if scenarios_config.get('standalone_invoices', 0) > 0:
-            fatture, transazioni, gt = self.generate_scenario_standalone_invoices(
-                scenarios_config['standalone_invoices']
-            )
-            all_fatture.extend(fatture)
-            all_transazioni.extend(transazioni)
-            all_ground_truth.extend(gt)
-
-        # Standalone Payments
-        if scenarios_config.get('standalone_payments', 0) > 0:
-            fatture, transazioni, gt = self.generate_scenario_standalone_payments(
-                scenarios_config['standalone_payments']
-            )
-            all_fatture.extend(fatture)
-            all_transazioni.extend(transazioni)
-            all_ground_truth.extend(gt)
+        for name, method in _SCENARIO_GENERATORS:
+            n_items = getattr(scenarios, name)
+            if n_items > 0:
+                with self._scenario_rng(name):
+                    self._run_scenario(getattr(self, method), n_items, collect)
         
         # Convert to DataFrames
-        fatture_df = pd.DataFrame([fattura.model_dump() for fattura in all_fatture])
-        transazioni_df = pd.DataFrame([transazione.model_dump() for transazione in all_transazioni])
-        ground_truth_df = pd.DataFrame([asdict(gt) for gt in all_ground_truth])
+        if shards is not None:
+            fatture_df = shards.read('invoices', _FATTURA_COLUMNS)
+            transazioni_df = shards.read('payments', _TRANSAZIONE_COLUMNS)
+            ground_truth_df = shards.read('ground_truth', _GROUND_TRUTH_COLUMNS)
+        else:
+            all_fatture, all_transazioni, all_ground_truth = (
+                list(chain.from_iterable(part[i] for part in parts)) for i in range(3)
+            )
+            fatture_df = _records_to_frame(all_fatture, _FATTURA_COLUMNS, _FATTURA_DTYPES)
+            transazioni_df = _records_to_frame(all_transazioni, _TRANSAZIONE_COLUMNS, _TRANSAZIONE_DTYPES)
+            ground_truth_df = _records_to_frame(all_ground_truth, _GROUND_TRUTH_COLUMNS, _GROUND_TRUTH_DTYPES)
         
         # Generate metadata
         metadata = {
             'generation_date': datetime.now().isoformat(),
-            'total_fatture': len(all_fatture),
-            'total_transazioni': len(all_transazioni),
-            'total_matches': len(all_ground_truth),
-            'scenarios': scenarios_config,
-            'config': self.config
+            'total_fatture': totals['fatture'],
+            'total_transazioni': totals['transazioni'],
+            'total_matches': totals['ground_truth'],
+            'scenarios': asdict(scenarios),
+            'config': self.settings.to_dict()
         }
         
         return fatture_df, transazioni_df, ground_truth_df, metadata
     
     def export_dataset(self, dataset: Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, Dict], 
-                      output_dir: str = "output"):
-        """Export dataset to multiple formats"""
+                      output_dir: str = "output", parquet: bool = False):
+        """Export dataset to multiple formats
+
+        With parquet=True each table is also written as a zstd-compressed
+        Parquet file, which keeps the column types and reloads much faster.
+        """
         fatture_df, transazioni_df, ground_truth_df, metadata = dataset
         
         os.makedirs(output_dir, exist_ok=True)
         
-        # Export to CSV
-        fatture_df.to_csv(f"{output_dir}/invoices.csv", index=False)
-        transazioni_df.to_csv(f"{output_dir}/payments.csv", index=False)
-        ground_truth_df.to_csv(f"{output_dir}/ground_truth.csv", index=False)
+        tables = (('invoices', fatture_df), ('payments', transazioni_df), ('ground_truth', ground_truth_df))
+        for name, df in tables:
+            # Export to CSV
+            _write_csv(df, f"{output_dir}/{name}.csv")
+            if parquet:
+                pq.write_table(_to_arrow(df), f"{output_dir}/{name}.parquet", compression='zstd')
         
         # Export metadata
         with open(f"{output_dir}/metadata.json", 'w') as f:
             json.dump(metadata, f, indent=2, default=str)
         
-        logger.info(f"Dataset exported to {output_dir}")
\ No newline at end of file
+        logger.info("Dataset exported to %s", output_dir)
+    
+    def close(self):
+        """Release the text generator's resources, such as the persistent response cache"""
+        self.ai_generator.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
\ No newline at end of file
@@ -0,0 +1,53 @@
+import json
+import time
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+_FINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+
+def run_chat_batch_job(client, bodies: List[dict], poll_interval: float = 30.0,
+                       completion_window: str = "24h") -> List[Optional[str]]:
+    """
+    Run chat completion requests through the OpenAI/Azure Batch API.
+
+    bodies are the request bodies that would be sent to /chat/completions.
+    Blocks until the job reaches a final state and returns the message content
+    of each request in input order, None where a request failed or is missing
+    from the output.
+    """
+    if not bodies:
+        return []
+
+    lines = [
+        json.dumps({"custom_id": str(i), "method": "POST", "url": "/chat/completions", "body": body})
+        for i, body in enumerate(bodies)
+    ]
+    batch_file = client.files.create(
+        file=("requests.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch"
+    )
+    job = client.batches.create(
+        input_file_id=batch_file.id, endpoint="/chat/completions", completion_window=completion_window
+    )
+    logger.info("Submitted batch job %s with %d requests", job.id, len(bodies))
+
+    while job.status not in _FINAL_STATES:
+        time.sleep(poll_interval)
+        job = client.batches.retrieve(job.id)
+
+    contents: List[Optional[str]] = [None] * len(bodies)
+    if job.status != "completed" or not job.output_file_id:
+        logger.error("Batch job %s ended with status %s", job.id, job.status)
+        return contents
+
+    for line in client.files.content(job.output_file_id).text.splitlines():
+        if not line:
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            logger.error("Batch request %s failed: %s", record.get("custom_id"), record.get("error") or response)
+            continue
+        contents[int(record["custom_id"])] = response["body"]["choices"][0]["message"]["content"]
+    return contents
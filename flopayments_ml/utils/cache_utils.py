@@ -0,0 +1,89 @@
+import json
+import hashlib
+import sqlite3
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+class ResponseCache:
+    """
+    Bounded exact-key LRU cache for generated LLM texts.
+
+    Keys are tuples of the prompt attributes that determine a response;
+    values are the generated text fields. Once maxsize entries are stored
+    the least recently used one is evicted.
+
+    When path is given, entries are also persisted to a SQLite file, so a
+    rerun of the same configuration reads them back instead of calling the
+    LLM again. The namespace (e.g. model and temperature) is part of the
+    stored key, so runs with different generation settings do not collide.
+    """
+
+    def __init__(self, maxsize: int = 10_000, path: Optional[str] = None, namespace: str = ""):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self.namespace = namespace
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            # WAL without a sync per commit keeps the per-put cost low
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._db.commit()
+
+    def _disk_key(self, key: Hashable) -> str:
+        return hashlib.sha256(repr((self.namespace, key)).encode()).hexdigest()
+
+    def _remember(self, key: Hashable, value: Tuple):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, key: Hashable) -> Optional[Tuple]:
+        """Return the cached value for key, or None on a miss."""
+        try:
+            value = self._entries[key]
+        except KeyError:
+            value = None
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value FROM responses WHERE key = ?", (self._disk_key(key),)
+                ).fetchone()
+                if row is not None:
+                    value = tuple(json.loads(row[0]))
+                    self._remember(key, value)
+            if value is None:
+                self.misses += 1
+                return None
+        else:
+            self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Tuple):
+        """Store value under key, evicting the least recently used entry if full."""
+        self._remember(key, value)
+        if self._db is not None:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value) VALUES (?, ?)",
+                    (self._disk_key(key), json.dumps(value))
+                )
+
+    def close(self):
+        """Close the SQLite file, if any."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,51 +1,220 @@
 import os
 import glob
+import stat
 import argparse
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from typing import List, Literal, Optional
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 
 from .file_utils import check_write_permission
 
-def csv_to_xlsx_sheets(csv_files: list[str], output_xlsx_file: str):
+# Bytes parsed per pyarrow block when streaming in constant-memory mode
+_CSV_BLOCK_SIZE = 8 << 20
+
+# Characters Excel does not allow in sheet names
+_XLSX_SHEET_TRANS = str.maketrans({c: '_' for c in '/\\*?[]:'})
+
+def _unique_sheet_name(csv_file: str, used_names: set) -> str:
+    """Build a valid sheet name (max 31 chars) not already in used_names (case-insensitive)."""
+    base_name = os.path.splitext(os.path.basename(csv_file))[0].translate(_XLSX_SHEET_TRANS)
+    sheet_name = base_name[:31]
+    counter = 1
+    while sheet_name.lower() in used_names:
+        suffix = f"~{counter}"
+        sheet_name = base_name[:31 - len(suffix)] + suffix
+        counter += 1
+    used_names.add(sheet_name.lower())
+    return sheet_name
+
+def _validate_inputs(csv_files: List[str]) -> List[tuple]:
+    """
+    Filter out missing paths and non-files, and assign each remaining CSV
+    a unique sheet name. Returns (path, sheet_name) pairs in input order.
+    """
+    inputs = []
+    used_sheet_names = set()
+    for csv_file in csv_files:
+        # One stat call answers both checks; readability is left to open(), which reports it precisely
+        try:
+            mode = os.stat(csv_file).st_mode
+        except FileNotFoundError:
+            print(f"Warning: CSV file '{csv_file}' not found. Skipping.")
+            continue
+        if not stat.S_ISREG(mode):
+            print(f"Warning: Path '{csv_file}' is not a file. Skipping.")
+            continue
+        inputs.append((csv_file, _unique_sheet_name(csv_file, used_sheet_names)))
+    return inputs
+
+def _read_csv_file(csv_file: str) -> pd.DataFrame:
+    """Parse a single CSV file into Arrow-backed columns. Runs inside a worker process."""
+    if os.path.getsize(csv_file) == 0:
+        raise pd.errors.EmptyDataError("No columns to parse from file")
+    return pd.read_csv(csv_file, engine="pyarrow", dtype_backend="pyarrow")
+
+def _format_date_columns(worksheet, arrow_types, date_format, datetime_format):
+    """Set an Excel date format on date and timestamp columns."""
+    # Cells written without a format inherit the column format
+    for col, arrow_type in enumerate(arrow_types):
+        if pa.types.is_timestamp(arrow_type):
+            worksheet.set_column(col, col, 19, datetime_format)
+        elif pa.types.is_date(arrow_type):
+            worksheet.set_column(col, col, 10, date_format)
+
+def _drop_timezone(column):
+    """Cast a timezone-aware timestamp column to naive UTC, as xlsxwriter's remove_timezone does."""
+    if pa.types.is_timestamp(column.type) and column.type.tz is not None:
+        return column.cast(pa.timestamp(column.type.unit))
+    return column
+
+def _iter_batch_rows(batches):
+    """Yield the rows of a sequence of record batches as tuples of Python values."""
+    for batch in batches:
+        # Excel has no time zones; openpyxl rejects aware datetimes outright
+        columns = [_drop_timezone(column).to_pylist() for column in batch.columns]
+        # Nulls come back as None, i.e. blank cells
+        yield from zip(*columns)
+
+def _open_csv_rows(csv_file: str):
+    """Open a CSV file with pyarrow's block reader. Returns its schema and an iterator over its rows.
+
+    The streaming reader infers column types from the first block only, so
+    every block is checked against them before any row is handed out. If a
+    later block does not fit (e.g. text further down an integer column), the
+    file is parsed whole instead, with types inferred from all of its rows.
+    """
+    if os.path.getsize(csv_file) == 0:
+        raise pd.errors.EmptyDataError("No columns to parse from file")
+
+    read_options = pacsv.ReadOptions(block_size=_CSV_BLOCK_SIZE, use_threads=True)
+    try:
+        for _ in pacsv.open_csv(csv_file, read_options=read_options):
+            pass
+    except pa.ArrowInvalid:
+        table = pacsv.read_csv(csv_file, read_options=read_options)
+        return table.schema, _iter_batch_rows(table.to_batches())
+
+    reader = pacsv.open_csv(csv_file, read_options=read_options)
+    return reader.schema, _iter_batch_rows(reader)
+
+def _stream_csv_to_sheet(workbook, sheet_name: str, csv_file: str, date_format, datetime_format):
+    """Stream a CSV file into a new worksheet, one pyarrow record batch at a time."""
+    schema, rows = _open_csv_rows(csv_file)
+
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, schema.names)
+    _format_date_columns(worksheet, schema.types, date_format, datetime_format)
+    for row_num, row in enumerate(rows, start=1):
+        worksheet.write_row(row_num, 0, row)
+
+def _append_csv_rows(workbook, sheet_name: str, csv_file: str):
+    """Stream a CSV file into a new sheet of a write-only openpyxl workbook.
+
+    Rows come from the same pyarrow reader as _stream_csv_to_sheet, so
+    numbers, booleans and dates are appended as typed cells rather than text.
+    If a row cannot be appended the partial sheet is dropped from the workbook.
+    """
+    schema, rows = _open_csv_rows(csv_file)
+
+    worksheet = workbook.create_sheet(sheet_name)
+    try:
+        worksheet.append(schema.names)
+        for row in rows:
+            worksheet.append(row)
+    except Exception:
+        worksheet.close()
+        workbook.remove(worksheet)
+        raise
+
+def _write_frame_columns(worksheet, df: pd.DataFrame, first_row: int):
+    """Write the values of df column by column, starting at first_row."""
+    for col, name in enumerate(df.columns):
+        series = df[name]
+        # xlsxwriter rejects NaN/NA values; leave those cells blank like to_excel did
+        if series.hasnans:
+            values = series.astype(object).where(series.notna(), None).tolist()
+        else:
+            values = series.tolist()
+        worksheet.write_column(first_row, col, values)
+
+def csv_to_xlsx_sheets(csv_files: list[str], output_xlsx_file: str, max_workers: Optional[int] = None,
+                       constant_memory: bool = True, engine: Literal['xlsxwriter', 'openpyxl'] = 'xlsxwriter'):
     """
     Converts a list of CSV files into a single XLSX file, with each CSV
     file becoming a separate sheet.
 
+    By default rows are streamed: each CSV is read block by block with
+    pyarrow's CSV reader and every row is flushed to disk as soon as it is
+    written (xlsxwriter constant_memory mode), so memory usage does not grow
+    with the size of the input. Date and timestamp columns detected by
+    pyarrow are written as Excel dates.
+    With constant_memory=False the files are instead parsed whole, in
+    parallel worker processes, and each sheet is written column by column
+    with write_column, which is faster for small and medium files.
+    With engine='openpyxl' the rows are streamed the same way into a
+    write-only openpyxl workbook, which also keeps memory flat;
+    constant_memory and max_workers are ignored in that case.
+
     Args:
         csv_files (list[str]): A list of paths to the input CSV files.
         output_xlsx_file (str): The path for the output XLSX file.
+        max_workers (int, optional): Number of worker processes used to parse
+            the CSV files when constant_memory is False. Defaults to the number of CPUs.
+        constant_memory (bool): Stream rows to disk instead of building each sheet in memory.
+        engine (str): Library used to write the workbook, 'xlsxwriter' or 'openpyxl'.
     """
     if not check_write_permission(output_xlsx_file):
         print(f"Cannot proceed: Output file '{output_xlsx_file}' is not writable.")
         return
 
+    # Check every input before the workbook is created, so bad paths cost no writer setup
+    inputs = _validate_inputs(csv_files)
+
+    workbook_options = {'constant_memory': constant_memory, 'use_zip64': True, 'remove_timezone': True}
+    if constant_memory:
+        workbook_options['tmpdir'] = os.path.dirname(output_xlsx_file) or '.'
+
     try:
-        with pd.ExcelWriter(output_xlsx_file, engine='xlsxwriter') as writer:
+        with ExitStack() as stack:
+            parsed = {}
+            if engine == 'xlsxwriter' and not constant_memory and inputs:
+                parsable_files = list(dict.fromkeys(csv_file for csv_file, _ in inputs))
+                if max_workers is None:
+                    max_workers = os.cpu_count() or 1
+                max_workers = max(1, min(max_workers, len(parsable_files)))
+                executor = stack.enter_context(ProcessPoolExecutor(max_workers=max_workers))
+                # Start parsing every file up front; results are consumed in order below
+                parsed = {f: executor.submit(_read_csv_file, f) for f in parsable_files}
+
+            # Only the selected writer is imported, and only when a workbook is actually built
+            if engine == 'openpyxl':
+                import openpyxl
+                workbook = openpyxl.Workbook(write_only=True)
+            else:
+                import xlsxwriter
+                workbook = stack.enter_context(xlsxwriter.Workbook(output_xlsx_file, workbook_options))
+                date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+                datetime_format = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
             print(f"Starting conversion to '{output_xlsx_file}'...")
             processed_count = 0
-            for csv_file in csv_files:
-                if not os.path.exists(csv_file):
-                    print(f"Warning: CSV file '{csv_file}' not found. Skipping.")
-                    continue
-                if not os.path.isfile(csv_file):
-                    print(f"Warning: Path '{csv_file}' is not a file. Skipping.")
-                    continue
-                if not os.access(csv_file, os.R_OK):
-                    print(f"Warning: CSV file '{csv_file}' is not readable. Skipping.")
-                    continue
-
+            for csv_file, sheet_name in inputs:
                 try:
+                    if engine == 'openpyxl':
+                        _append_csv_rows(workbook, sheet_name, csv_file)
+                    elif csv_file in parsed:
+                        df = parsed[csv_file].result()
+                        worksheet = workbook.add_worksheet(sheet_name)
+                        worksheet.write_row(0, 0, list(df.columns))
+                        _format_date_columns(worksheet, [getattr(dtype, 'pyarrow_dtype', pa.null()) for dtype in df.dtypes],
+                                             date_format, datetime_format)
+                        _write_frame_columns(worksheet, df, 1)
+                    else:
+                        _stream_csv_to_sheet(workbook, sheet_name, csv_file, date_format, datetime_format)
 
-                    df = pd.read_csv(csv_file)
-                    sheet_name = os.path.splitext(os.path.basename(csv_file))[0]
-                    # Excel sheet names have restrictions. Simple sanitization:
-                    sheet_name = sheet_name.replace('/', '_').replace('\\', '_').replace('*', '_')
-                    sheet_name = sheet_name.replace('?', '_').replace('[', '_').replace(']', '_')
-                    sheet_name = sheet_name.replace(':', '_') # Colons are invalid in sheet names
-                    sheet_name = sheet_name[:31] # Max 31 characters for sheet name
-
-                    df.to_excel(writer, sheet_name=sheet_name, index=False)
                     print(f"Successfully added '{csv_file}' as sheet '{sheet_name}'.")
                     processed_count += 1
 
@@ -57,6 +226,9 @@ def csv_to_xlsx_sheets(csv_files: list[str], output_xlsx_file: str):
             if processed_count == 0:
                 print("No valid CSV files were processed. The output XLSX file might be empty or not created.")
             else:
+                if engine == 'openpyxl':
+                    # Written once, after every sheet has been streamed in full
+                    workbook.save(output_xlsx_file)
                 print(f"Conversion complete! {processed_count} CSV files converted to '{output_xlsx_file}'.")
 
     except Exception as e:
@@ -80,10 +252,9 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
-    expanded_csv_files = []
-    for pattern in args.csv_files:
-        expanded_csv_files.extend(glob.glob(pattern))
-    expanded_csv_files = sorted(list(set(expanded_csv_files)))
+    expanded_csv_files = sorted({
+        path for pattern in args.csv_files for path in glob.glob(pattern)
+    })
 
     if not expanded_csv_files:
         print("Error: No CSV files found matching the provided patterns.")
@@ -0,0 +1,58 @@
+from datetime import date
+from typing import Dict
+
+import numpy as np
+
+_COLUMNS = {
+    'company_id': object,
+    'fattura_id': object,
+    'committente': object,
+    'tipo_servizio': object,
+    'importo': 'f8',
+    'data_emissione': 'datetime64[D]',
+}
+
+class InvoiceHistory:
+    """
+    Columnar log of the generated invoices of all companies.
+
+    Each field is a NumPy array indexed by insertion order; the arrays grow by
+    doubling, so appends are amortised O(1) and per-company queries are a
+    single vectorized mask over company_id.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._len = 0
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.empty(capacity, dtype=dtype) for name, dtype in _COLUMNS.items()
+        }
+
+    def append(self, company_id: str, fattura_id: str, committente: str,
+               tipo_servizio: str, importo: float, data_emissione: date):
+        """Record one invoice"""
+        if self._len == len(self._columns['company_id']):
+            for name, column in self._columns.items():
+                grown = np.empty(2 * len(column), dtype=column.dtype)
+                grown[:self._len] = column
+                self._columns[name] = grown
+        i = self._len
+        columns = self._columns
+        columns['company_id'][i] = company_id
+        columns['fattura_id'][i] = fattura_id
+        columns['committente'][i] = committente
+        columns['tipo_servizio'][i] = tipo_servizio
+        columns['importo'][i] = importo
+        columns['data_emissione'][i] = data_emissione
+        self._len = i + 1
+
+    def column(self, name: str) -> np.ndarray:
+        """View of the filled part of a column"""
+        return self._columns[name][:self._len]
+
+    def for_company(self, company_id: str) -> Dict[str, np.ndarray]:
+        """All columns restricted to the invoices of one company"""
+        mask = self.column('company_id') == company_id
+        return {name: self.column(name)[mask] for name in self._columns}
+
+    def __len__(self) -> int:
+        return self._len
@@ -0,0 +1,52 @@
+import os
+import tempfile
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+class ParquetShardWriter:
+    """
+    Spills generated rows to numbered Parquet shards, one series per table,
+    so that the Python objects of a batch can be released as soon as it is
+    written.
+
+    Every writer works in its own fresh subdirectory of shard_dir, so shards
+    left over from a previous run are never read back.
+    """
+
+    def __init__(self, shard_dir: str):
+        os.makedirs(shard_dir, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix="shards_", dir=shard_dir)
+        self._shards: Dict[str, List[str]] = {}
+        # Arrow schema of the first frame given for each table, kept for tables with no shard
+        self._schemas: Dict[str, pa.Schema] = {}
+
+    def write_frame(self, table_name: str, df: pd.DataFrame):
+        """Write df as the next shard of table_name. Empty frames only record the table's schema."""
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        self._schemas.setdefault(table_name, table.schema)
+        if df.empty:
+            return
+        shards = self._shards.setdefault(table_name, [])
+        shard_path = os.path.join(self.path, f"{table_name}_shard_{len(shards):04d}.parquet")
+        pq.write_table(table, shard_path)
+        shards.append(shard_path)
+
+    def read(self, table_name: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Concatenate the shards of table_name, in write order, into a single DataFrame.
+
+        A table with no shard comes back empty, with the schema of the frames
+        given for it, or with the given columns if no frame was ever written.
+        """
+        shards = self._shards.get(table_name)
+        if not shards:
+            schema = self._schemas.get(table_name)
+            if schema is None:
+                return pd.DataFrame(columns=list(columns or []))
+            return schema.empty_table().to_pandas()
+        # Columns that were all-null in one shard are promoted to the type seen in the others
+        table = pa.concat_tables([pq.read_table(path) for path in shards], promote_options="default")
+        return table.to_pandas()
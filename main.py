@@ -29,18 +29,17 @@ def main():
         if not api_key:
             raise EnvironmentConfigError('AZURE_OPENAI_API_KEY not found')
         
-        # Initialize generator
-        generator = SyntheticDataGenerator(
+        # Initialize generator; leaving the block closes its response cache
+        with SyntheticDataGenerator(
             config=DEFAULT_CONFIG,
             azure_endpoint="https://iason-gpt-4.openai.azure.com"
-        )
-        
-        # Generate dataset
-        logger.info("Generating synthetic dataset...")
-        dataset = generator.generate_dataset()
-        
-        # Export dataset
-        generator.export_dataset(dataset, output_dir="output")
+        ) as generator:
+            # Generate dataset
+            logger.info("Generating synthetic dataset...")
+            dataset = generator.generate_dataset()
+            
+            # Export dataset
+            generator.export_dataset(dataset, output_dir="output")
         csv_to_xlsx_sheets(
             csv_files=['output/invoices.csv', 'output/payments.csv', 'output/ground_truth.csv'],
             output_xlsx_file='output/dataset.xlsx'
@@ -49,7 +48,7 @@ def main():
         logger.info("Dataset generation completed!")
         
     except Exception as e:
-        logger.error(f"Error during dataset generation: {e}")
+        logger.error("Error during dataset generation: %s", e)
         raise
 
 if __name__ == "__main__":
@@ -0,0 +1,52 @@
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from flopayments_ml import SyntheticDataGenerator
+from flopayments_ml.core.data_models import AIInvoiceOutput, AITransactionOutput
+
+# Columns set by the random draws; ids and invoice numbers are sequential across the run
+_INVOICE_COLUMNS = ['data_emissione', 'data_scadenza', 'importo', 'prestatore', 'committente', 'descrizione']
+_PAYMENT_COLUMNS = ['data', 'importo', 'controparte', 'dettaglio', 'causale', 'invoice_number']
+# Invoice numbers quoted in the payment texts are masked for the same reason
+_INVOICE_NUMBER_RE = r'FT\d{4}/\d{4}'
+
+
+def _generator(scenarios):
+    generator = SyntheticDataGenerator(
+        {'num_companies': 6, 'seed': 1, 'scenarios': scenarios}, "http://127.0.0.1:9"
+    )
+    # Stand-in chains, so no request leaves the test
+    ai = generator.ai_generator
+    ai._invoice_chain = RunnableLambda(
+        lambda inputs: AIInvoiceOutput(descrizione="Prestazione", committente="ACME SRL")
+    )
+    ai._trans_chain_with = ai._trans_chain_without = RunnableLambda(
+        lambda inputs: AITransactionOutput(dettaglio="BONIFICO SEPA", causale="Pagamento", controparte="ACME SRL")
+    )
+    return generator
+
+
+def _payment_draws(transazioni):
+    draws = transazioni[_PAYMENT_COLUMNS].copy()
+    for column in ('dettaglio', 'causale'):
+        draws[column] = draws[column].str.replace(_INVOICE_NUMBER_RE, 'FT', regex=True)
+    return draws
+
+
+@pytest.mark.parametrize('template_fraction', [0.0, 0.5])
+def test_scenario_output_does_not_depend_on_preceding_scenarios(monkeypatch, template_fraction):
+    monkeypatch.setenv("AZURE_OPENAI_API_KEY", "test")
+    alone = _generator({'installments_1_n': 5})
+    after = _generator({'perfect_1_1': 10, 'installments_1_n': 5})
+    for generator in (alone, after):
+        generator.ai_generator.template_fraction = template_fraction
+
+    fatture_alone, transazioni_alone, _, _ = alone.generate_dataset()
+    fatture_after, transazioni_after, _, _ = after.generate_dataset()
+
+    # perfect_1_1 runs first and adds one invoice and one payment per pair
+    fatture_after = fatture_after.iloc[10:].reset_index(drop=True)
+    transazioni_after = transazioni_after.iloc[10:].reset_index(drop=True)
+    assert len(fatture_alone) == len(fatture_after) == 5
+    assert fatture_alone[_INVOICE_COLUMNS].equals(fatture_after[_INVOICE_COLUMNS])
+    assert _payment_draws(transazioni_alone).equals(_payment_draws(transazioni_after))
@@ -0,0 +1,26 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from flopayments_ml.generators.synthetic_data_generator import _write_csv
+
+
+def test_written_csv_reads_back_like_to_csv(tmp_path):
+    df = pd.DataFrame({
+        'data': pd.to_datetime(['2024-01-31', '2024-02-29', None]).astype('datetime64[us]'),
+        'ora': pd.to_datetime(['2024-01-31 10:30', '2024-02-29 00:00', '2024-03-01 00:00']).astype('datetime64[us]'),
+        # Whole-valued floats must stay floats, e.g. a confidence of 1.0
+        'confidence': [1.0, 1.0, 0.75],
+        'importo': [1200.0, np.nan, 99.99],
+        'invoice_number': [True, False, True],
+        'controparte': ['Rossi, Bianchi e Verdi SRL', 'ACME "Italia" SPA', ''],
+    })
+    path = tmp_path / 'table.csv'
+
+    _write_csv(df, str(path))
+
+    expected = pd.read_csv(io.StringIO(df.to_csv(index=False)))
+    written = pd.read_csv(path)
+    assert written.dtypes.equals(expected.dtypes)
+    assert written.equals(expected)